@@ -0,0 +1,66 @@
+from collections import namedtuple
+
+# One quality tier of the CV pipeline.
+#   complexity  -> mp_pose.Pose(model_complexity=...)
+#   infer_height -> frame height fed to the models (None = native)
+#   hands_every -> run Hands on every Nth frame, reuse the last result otherwise
+Tier = namedtuple("Tier", ["name", "complexity", "infer_height", "hands_every"])
+
+# Ordered best quality -> cheapest
+TIERS = [
+    Tier("ultra", 2, None, 1),
+    Tier("high", 1, None, 1),     # original fixed settings
+    Tier("medium", 1, 480, 1),
+    Tier("low", 0, 480, 2),
+    Tier("minimal", 0, 360, 3),
+]
+DEFAULT_TIER = 1
+
+
+class AdaptiveController:
+    """Moves between quality tiers to keep inference inside a frame budget.
+
+    Feed it the inference time of every frame with update(). It keeps an
+    exponential moving average and steps down a tier when the average is
+    over budget, or up a tier when it has had plenty of headroom for a
+    while. A cooldown after each switch stops it oscillating while the new
+    models warm up.
+    """
+
+    def __init__(self, target_fps=30.0, tiers=TIERS, start=DEFAULT_TIER,
+                 alpha=0.1, headroom=0.6, cooldown=45):
+        self.tiers = tiers
+        self.index = start
+        self.budget_ms = 1000.0 / target_fps
+        self.alpha = alpha
+        self.headroom = headroom   # step up only below this fraction of budget
+        self.cooldown = cooldown   # frames to wait after a switch
+        self.avg_ms = None
+        self._frames_since_switch = 0
+
+    @property
+    def tier(self):
+        return self.tiers[self.index]
+
+    def update(self, infer_ms):
+        """Record one frame's inference time. Returns True if the tier changed."""
+        if self.avg_ms is None:
+            self.avg_ms = infer_ms
+        else:
+            self.avg_ms += self.alpha * (infer_ms - self.avg_ms)
+
+        self._frames_since_switch += 1
+        if self._frames_since_switch < self.cooldown:
+            return False
+
+        if self.avg_ms > self.budget_ms and self.index < len(self.tiers) - 1:
+            self.index += 1
+        elif self.avg_ms < self.headroom * self.budget_ms and self.index > 0:
+            self.index -= 1
+        else:
+            return False
+
+        # Start the new tier's average fresh; the old numbers don't apply
+        self.avg_ms = None
+        self._frames_since_switch = 0
+        return True
@@ -0,0 +1,80 @@
+import numpy as np
+
+# MediaPipe landmark indices (mp_pose.PoseLandmark / mp_hands.HandLandmark)
+RIGHT_SHOULDER = 12
+RIGHT_ELBOW = 14
+RIGHT_WRIST = 16
+RIGHT_HIP = 24
+HAND_WRIST = 0
+HAND_MCPS = [5, 9, 13, 17]  # index, middle, ring, pinky knuckles
+
+EPS = 1e-6
+
+
+def landmarks_to_array(landmarks, out=None):
+    """Copy a MediaPipe landmark list into an (N, 3) float32 array of x, y, z."""
+    if out is None:
+        out = np.empty((len(landmarks), 3), dtype=np.float32)
+    for i, p in enumerate(landmarks):
+        out[i, 0] = p.x
+        out[i, 1] = p.y
+        out[i, 2] = p.z
+    return out
+
+
+def _joint_angle(a, b, c):
+    """Unsigned angle ABC in degrees over the last axis (2D)."""
+    ba = a - b
+    bc = c - b
+    n_ba = np.linalg.norm(ba, axis=-1)
+    n_bc = np.linalg.norm(bc, axis=-1)
+    ok = ~((n_ba < EPS) | (n_bc < EPS))  # NaN input stays NaN
+    denom = np.where(ok, n_ba * n_bc, 1.0)
+    cosine = np.clip(np.einsum("...i,...i->...", ba, bc) / denom, -1.0, 1.0)
+    return np.where(ok, np.degrees(np.arccos(cosine)), 0.0)
+
+
+def _signed_angle(v1, v2):
+    """Signed angle from v1 to v2 in degrees over the last axis (2D)."""
+    n1 = np.linalg.norm(v1, axis=-1)
+    n2 = np.linalg.norm(v2, axis=-1)
+    ok = ~((n1 < EPS) | (n2 < EPS))
+    dot = np.einsum("...i,...i->...", v1, v2)
+    det = v1[..., 0] * v2[..., 1] - v1[..., 1] * v2[..., 0]
+    # atan2 is scale-invariant, so no need to normalise first
+    return np.where(ok, np.degrees(np.arctan2(det, dot)), 0.0)
+
+
+def arm_angles(pose, hand=None, size=(1, 1)):
+    """Right-arm angles from landmark arrays in one vectorised pass.
+
+    pose is (33, 3) or a (frames, 33, 3) batch of normalised pose landmarks,
+    hand the matching (21, 3) / (frames, 21, 3) hand landmarks or None.
+    size is the (width, height) of the frame the landmarks refer to; the
+    wrist angle is measured in pixels, as the live pipeline does.
+
+    Returns (..., 3) float64: shoulder angle, elbow angle and the raw signed
+    wrist angle (0 where no hand is given). Batched frames without a hand
+    can be passed as NaN rows and come back as NaN.
+    """
+    pose = np.asarray(pose, dtype=np.float64)
+    xy = pose[..., :2]
+    shoulder = xy[..., RIGHT_SHOULDER, :]
+    elbow = xy[..., RIGHT_ELBOW, :]
+    wrist = xy[..., RIGHT_WRIST, :]
+    hip = xy[..., RIGHT_HIP, :]
+
+    out = np.zeros(pose.shape[:-2] + (3,))
+    out[..., 0] = _joint_angle(hip, shoulder, elbow)
+    out[..., 1] = _joint_angle(shoulder, elbow, wrist)
+
+    if hand is not None:
+        hand = np.asarray(hand, dtype=np.float64)
+        scale = np.array(size, dtype=np.float64)
+        # Pixel coordinates truncated like the original int() conversions
+        elbow_px = np.trunc(elbow * scale)
+        wrist_px = np.trunc(wrist * scale)
+        hand_wrist_px = np.trunc(hand[..., HAND_WRIST, :2] * scale)
+        palm_px = np.trunc(hand[..., HAND_MCPS, :2].mean(axis=-2) * scale)
+        out[..., 2] = _signed_angle(wrist_px - elbow_px, palm_px - hand_wrist_px)
+    return out
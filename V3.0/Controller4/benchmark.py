@@ -0,0 +1,326 @@
+"""Benchmark the CV pipeline across configurations.
+
+    python benchmark.py --out bench.json
+    python benchmark.py --clip arm.mp4 --frames 300 --out bench.json
+    python benchmark.py --landmarks-only --session session.jblm
+    python benchmark.py --out new.json --compare bench.json
+
+Pipeline runs push frames through CVEngine.process(), the same path
+CVWorker uses, from synthetic frames at each --resolutions size and from
+any --clip files. Starting from a baseline configuration, one setting at a
+time is varied: resolution, pose model complexity, Hands on/off, Hands on
+a wrist crop, filter and overlay on/off. --full runs every combination instead.
+
+Landmark runs time the angle kernel and each filter on a recorded session
+(see recording.py) or on generated landmarks. They don't need MediaPipe.
+
+Every configuration runs in a fresh process so its peak RSS is its own.
+The results are written as JSON. --compare flags any configuration whose
+fps fell by more than --tolerance and exits with status 1.
+"""
+import argparse
+import itertools
+import json
+import multiprocessing
+import platform
+import queue as queue_module
+import time
+import tracemalloc
+
+import numpy as np
+
+from angles import arm_angles
+from filters import FILTERS, make_filter
+from instrument import Profiler, peak_rss_mb
+from recording import RECORD_DTYPE, FLAG_HAND, load_session
+
+BASELINE = {"input": "synthetic:640x480", "complexity": 1, "hands": True,
+            "hand_roi": False, "filter": "moving_average", "overlay": True}
+
+
+def _stage_summary(profiler):
+    return {stage: {k: round(v, 3) for k, v in row.items() if k != "count"}
+            for stage, row in profiler.summary().items()}
+
+
+def _alloc_pass(step, frames):
+    """Run step() frames times under tracemalloc.
+
+    Returns (mean peak bytes allocated within one frame, bytes still held
+    per frame afterwards). Python has no cheap allocation counter, so bytes
+    traced per frame stand in for it; NumPy buffers are included.
+    """
+    tracemalloc.start()
+    try:
+        start = tracemalloc.get_traced_memory()[0]
+        peaks = []
+        for _ in range(frames):
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            step()
+            peaks.append(tracemalloc.get_traced_memory()[1] - before)
+        retained = tracemalloc.get_traced_memory()[0] - start
+    finally:
+        tracemalloc.stop()
+    return float(np.mean(peaks)), retained / frames
+
+
+# ---------------- Pipeline runs ---------------- #
+def _open_input(spec, frames):
+    from sources import SyntheticSource, VideoFileSource
+    if spec.startswith("synthetic"):
+        width, height = (int(v) for v in spec.split(":", 1)[1].split("x"))
+        return SyntheticSource(width, height, frames=frames, loop=True)
+    return VideoFileSource(spec, loop=True)
+
+
+def run_pipeline(config, frames, warmup, alloc_frames):
+    # Imported here so landmark-only runs work without MediaPipe
+    from cv_engine import CVEngine
+
+    source = _open_input(config["input"], frames)
+    engine = CVEngine(source=source, hands=config["hands"], hand_roi=config["hand_roi"],
+                      filter_name=config["filter"], preview=True)
+    engine.tier = engine.tier._replace(complexity=config["complexity"])
+    engine.overlay_enabled = config["overlay"]
+    engine.open()
+    try:
+        def step():
+            item = source.read()
+            return engine.process(*item) is not None
+
+        for _ in range(warmup):
+            step()
+        engine.profiler = Profiler(window=max(frames, 1))
+        found = 0
+        elapsed = 0.0
+        for _ in range(frames):
+            item = source.read()
+            t = time.perf_counter()
+            found += engine.process(*item) is not None
+            elapsed += time.perf_counter() - t
+        stages = _stage_summary(engine.profiler)
+        # Read up front so the input generator's allocations don't count
+        items = iter([source.read() for _ in range(alloc_frames)])
+        alloc, retained = _alloc_pass(lambda: engine.process(*next(items)), alloc_frames)
+    finally:
+        engine.close()
+    return {"frames": frames, "fps": frames / elapsed if elapsed else None,
+            "pose_found": found / frames, "stages": stages,
+            "alloc_bytes_per_frame": alloc, "retained_bytes_per_frame": retained}
+
+
+# ---------------- Landmark runs ---------------- #
+def synthetic_landmarks(count=600, fps=30.0, seed=0):
+    """Session records of a swinging right arm, hand visible 3 frames in 4."""
+    rng = np.random.default_rng(seed)
+    session = np.zeros(count, dtype=RECORD_DTYPE)
+    t = np.arange(count) / fps
+    session["timestamp"] = t
+    session["frame_size"] = (640, 480)
+    session["pose"] = rng.uniform(0.3, 0.7, (count, 33, 3))
+    session["visibility"] = 0.9
+    a1 = np.radians(30 + 40 * np.sin(2 * np.pi * 0.25 * t))
+    a2 = a1 + np.radians(20 + 50 * (1 + np.sin(2 * np.pi * 0.4 * t)) / 2)
+    pose = session["pose"]
+    pose[:, 24, :2] = (0.45, 0.75)                      # hip
+    pose[:, 12, :2] = (0.45, 0.35)                      # shoulder
+    pose[:, 14, 0] = 0.45 + 0.15 * np.sin(a1)           # elbow
+    pose[:, 14, 1] = 0.35 + 0.2 * np.cos(a1)
+    pose[:, 16, 0] = pose[:, 14, 0] + 0.13 * np.sin(a2)  # wrist
+    pose[:, 16, 1] = pose[:, 14, 1] + 0.18 * np.cos(a2)
+    hand = rng.normal(0.0, 0.02, (count, 21, 3)) + pose[:, 16:17, :]
+    has_hand = np.arange(count) % 4 != 3
+    session["hand"] = np.where(has_hand[:, None, None], hand, np.nan)
+    session["flags"] = np.where(has_hand, FLAG_HAND, 0)
+    return session
+
+
+def run_landmarks(config, frames, warmup, alloc_frames):
+    session = (load_session(config["session"]) if config["session"]
+               else synthetic_landmarks(max(frames, 1)))
+    if len(session) == 0:
+        raise ValueError(f"{config['session']} has no records")
+    smoother = make_filter(config["filter"])
+    prof = Profiler(window=max(frames, 1))
+    index = itertools.cycle(range(len(session)))
+
+    def step():
+        r = session[next(index)]
+        hand = r["hand"] if r["flags"] & FLAG_HAND else None
+        prof.start()
+        s, e, w = arm_angles(r["pose"], hand, tuple(r["frame_size"]))
+        prof.mark("angles")
+        smoother([np.clip(s, 0, 180), np.clip(e, 0, 180), np.clip(w, 0, 180)], r["timestamp"])
+        prof.mark("smoothing")
+        prof.end("frame")
+
+    for _ in range(warmup):
+        step()
+    prof = Profiler(window=max(frames, 1))
+    t = time.perf_counter()
+    for _ in range(frames):
+        step()
+    elapsed = time.perf_counter() - t
+    stages = _stage_summary(prof)
+    alloc, retained = _alloc_pass(step, alloc_frames)
+    return {"frames": frames, "fps": frames / elapsed if elapsed else None,
+            "stages": stages, "alloc_bytes_per_frame": alloc,
+            "retained_bytes_per_frame": retained}
+
+
+# ---------------- Driver ---------------- #
+def _child(kind, config, frames, warmup, alloc_frames, queue):
+    try:
+        run = run_pipeline if kind == "pipeline" else run_landmarks
+        row = run(config, frames, warmup, alloc_frames)
+        row["peak_rss_mb"] = peak_rss_mb()
+        queue.put(row)
+    except Exception as e:
+        queue.put({"error": f"{type(e).__name__}: {e}"})
+
+
+def run_isolated(kind, config, args):
+    """Run one configuration in a fresh process and return its result row.
+
+    A child that dies without reporting (a native crash, an OOM kill) or
+    outlives --timeout gives an error row instead of hanging the run.
+    """
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_child, args=(kind, config, args.frames, args.warmup,
+                                            args.alloc_frames, queue))
+    proc.start()
+    deadline = time.monotonic() + args.timeout
+    row = None
+    while row is None:
+        try:
+            row = queue.get(timeout=1.0)
+        except queue_module.Empty:
+            if not proc.is_alive():
+                # The result may have landed just before the exit
+                try:
+                    row = queue.get(timeout=1.0)
+                except queue_module.Empty:
+                    row = {"error": f"child exited with code {proc.exitcode}"}
+            elif time.monotonic() > deadline:
+                proc.terminate()
+                row = {"error": f"timed out after {args.timeout:.0f} s"}
+    proc.join()
+    return row
+
+
+def config_name(kind, config):
+    return kind + ":" + ",".join(f"{k}={v}" for k, v in config.items())
+
+
+def pipeline_configs(args):
+    inputs = [f"synthetic:{r}" for r in args.resolutions] + list(args.clip)
+    axes = {"input": inputs, "complexity": args.complexities, "hands": [True, False],
+            "hand_roi": [False, True], "filter": args.filters, "overlay": [True, False]}
+    baseline = dict(BASELINE, input=inputs[0])
+    if args.full:
+        for values in itertools.product(*axes.values()):
+            yield dict(zip(axes, values))
+        return
+    yield baseline
+    for axis, values in axes.items():
+        for value in values:
+            if value != baseline[axis]:
+                yield dict(baseline, **{axis: value})
+
+
+def landmark_configs(args):
+    for name in args.filters:
+        yield {"session": args.session, "filter": name}
+
+
+def metadata():
+    meta = {"time": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": platform.python_version(),
+            "platform": platform.platform(), "processor": platform.processor(),
+            "numpy": np.__version__}
+    for module in ("cv2", "mediapipe"):
+        try:
+            meta[module] = __import__(module).__version__
+        except ImportError:
+            meta[module] = None
+    return meta
+
+
+def compare(results, baseline_path, tolerance):
+    """Print fps changes against an earlier results file; return the regressions."""
+    with open(baseline_path) as f:
+        old = {r["name"]: r for r in json.load(f)["results"]}
+    regressions = []
+    for row in results:
+        prev = old.get(row["name"])
+        if not prev or not prev.get("fps") or not row.get("fps"):
+            continue
+        change = row["fps"] / prev["fps"] - 1.0
+        flag = ""
+        if change < -tolerance:
+            flag = "  REGRESSION"
+            regressions.append(row["name"])
+        print(f"{row['name']}: {prev['fps']:.1f} -> {row['fps']:.1f} fps ({change:+.1%}){flag}")
+    return regressions
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="Benchmark the CV pipeline")
+    p.add_argument("--frames", type=int, default=150, help="timed frames per configuration")
+    p.add_argument("--warmup", type=int, default=20, help="untimed frames first (model warm-up)")
+    p.add_argument("--alloc-frames", type=int, default=30,
+                   help="frames measured under tracemalloc (run separately from timing)")
+    p.add_argument("--resolutions", nargs="+", default=["640x480", "1280x720", "320x240"],
+                   help="synthetic input sizes; the first is the baseline")
+    p.add_argument("--clip", nargs="*", default=[], help="video files to run as extra inputs")
+    p.add_argument("--complexities", nargs="+", type=int, default=[1, 0, 2],
+                   help="pose model complexities")
+    p.add_argument("--filters", nargs="+", default=list(FILTERS), choices=list(FILTERS))
+    p.add_argument("--timeout", type=float, default=600.0,
+                   help="seconds before a configuration is killed and recorded as an error")
+    p.add_argument("--full", action="store_true",
+                   help="run every combination instead of one change at a time")
+    p.add_argument("--session", default=None,
+                   help="landmark session for the landmark runs (default: generated)")
+    p.add_argument("--landmarks-only", action="store_true", help="skip the pipeline runs")
+    p.add_argument("--out", default=None, help="write results JSON here")
+    p.add_argument("--compare", default=None, metavar="PATH",
+                   help="earlier results JSON to check for fps regressions")
+    p.add_argument("--tolerance", type=float, default=0.1,
+                   help="fractional fps drop counted as a regression (default 0.1)")
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    runs = [("landmarks", c) for c in landmark_configs(args)]
+    if not args.landmarks_only:
+        runs += [("pipeline", c) for c in pipeline_configs(args)]
+
+    results = []
+    for kind, config in runs:
+        name = config_name(kind, config)
+        row = {"name": name, "kind": kind, "config": config, **run_isolated(kind, config, args)}
+        results.append(row)
+        if "error" in row:
+            print(f"{name}: {row['error']}", flush=True)
+            continue
+        frame = row["stages"].get("frame", {})
+        rss = row["peak_rss_mb"]
+        rss_text = f"  peak RSS {rss:.0f} MiB" if rss is not None else ""
+        print(f"{name}: {row['fps']:.1f} fps  frame p50 {frame.get('p50', 0):.2f} ms"
+              f"  alloc {row['alloc_bytes_per_frame'] / 1024:.1f} KiB/frame{rss_text}",
+              flush=True)
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({"meta": metadata(), "results": results}, f, indent=2)
+    if args.compare:
+        if compare(results, args.compare, args.tolerance):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,224 @@
+import threading
+import time
+from collections import namedtuple
+import cv2
+
+# Requested camera settings; None leaves the driver default.
+#   fourcc      -> "MJPG", "YUYV", ... (MJPG gets most UVC webcams past ~10 fps at 720p)
+#   buffer_size -> driver frame queue length; 1 keeps latency lowest
+#   backend     -> key of BACKENDS, e.g. "v4l2" or "dshow"
+CaptureSettings = namedtuple("CaptureSettings",
+                             ["width", "height", "fourcc", "fps", "buffer_size", "backend"],
+                             defaults=[None] * 6)
+
+BACKENDS = {name: getattr(cv2, const) for name, const in [
+    ("any", "CAP_ANY"), ("v4l2", "CAP_V4L2"), ("dshow", "CAP_DSHOW"), ("msmf", "CAP_MSMF"),
+    ("avfoundation", "CAP_AVFOUNDATION"), ("gstreamer", "CAP_GSTREAMER"),
+] if hasattr(cv2, const)}
+
+# Driver timestamps further than this from time.monotonic() are on another clock
+DRIVER_CLOCK_TOLERANCE = 1.0
+
+
+def open_capture(cam_index, settings=None):
+    """cv2.VideoCapture on cam_index with the requested settings applied."""
+    settings = settings or CaptureSettings()
+    if settings.backend:
+        if settings.backend not in BACKENDS:
+            raise ValueError(f"Unknown capture backend {settings.backend!r}; "
+                             f"choose from {', '.join(BACKENDS)}")
+        cap = cv2.VideoCapture(cam_index, BACKENDS[settings.backend])
+    else:
+        cap = cv2.VideoCapture(cam_index)
+    if not cap.isOpened():
+        return cap
+    # FOURCC first: many drivers only offer the larger sizes compressed
+    if settings.fourcc:
+        cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*settings.fourcc))
+    if settings.width:
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, settings.width)
+    if settings.height:
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, settings.height)
+    if settings.fps:
+        cap.set(cv2.CAP_PROP_FPS, settings.fps)
+    if settings.buffer_size:
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, settings.buffer_size)
+    return cap
+
+
+def negotiated_settings(cap):
+    """What the driver actually agreed to, as a dict."""
+    code = int(cap.get(cv2.CAP_PROP_FOURCC))
+    fourcc = "".join(chr((code >> (8 * i)) & 0xFF) for i in range(4)).strip("\0 ") or None
+    try:
+        backend = cap.getBackendName()
+    except cv2.error:
+        backend = None
+    return {
+        "width": int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+        "height": int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+        "fourcc": fourcc,
+        "fps": cap.get(cv2.CAP_PROP_FPS),
+        "buffer_size": max(0, int(cap.get(cv2.CAP_PROP_BUFFERSIZE))) or None,  # -1 = unsupported
+        "backend": backend,
+        "timestamps": None,  # "driver" or "host", known after the first frame
+    }
+
+
+def add_capture_args(parser):
+    """Add the camera setting options shared by the GUI and headless runner."""
+    g = parser.add_argument_group("camera")
+    g.add_argument("--width", type=int, default=None, help="requested frame width")
+    g.add_argument("--height", type=int, default=None, help="requested frame height")
+    g.add_argument("--fourcc", default=None, help="pixel format, e.g. MJPG or YUYV")
+    g.add_argument("--camera-fps", type=float, default=None, help="requested camera frame rate")
+    g.add_argument("--buffer-size", type=int, default=None,
+                   help="driver frame buffer length (1 = lowest latency)")
+    g.add_argument("--backend", default=None, choices=list(BACKENDS), help="capture backend")
+
+
+def settings_from_args(args):
+    return CaptureSettings(args.width, args.height, args.fourcc, args.camera_fps,
+                           args.buffer_size, args.backend)
+
+
+def format_settings(info):
+    if not info:
+        return "no camera settings yet"
+    return (f"{info['width']}x{info['height']} {info['fourcc'] or '?'} "
+            f"@ {info['fps']:.0f} fps, buffer {info['buffer_size'] or '?'}, "
+            f"{info['backend'] or '?'} backend, {info['timestamps'] or '?'} timestamps")
+
+
+class FrameSlot:
+    """Single-slot, overwrite-on-write frame buffer (latest frame wins)."""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._frame = None
+        self._timestamp = 0.0
+        self._seq = 0
+        self._consumed_seq = 0
+        self._closed = False
+        self.dropped = 0  # frames overwritten before the consumer saw them
+
+    def put(self, frame, timestamp=None):
+        with self._cond:
+            if self._seq > self._consumed_seq:
+                self.dropped += 1
+            self._frame = frame
+            self._timestamp = time.monotonic() if timestamp is None else timestamp
+            self._seq += 1
+            self._cond.notify_all()
+
+    def get(self, timeout=1.0):
+        """Wait for a frame newer than the last one returned.
+
+        Returns (seq, frame, timestamp), or None on timeout / close.
+        """
+        with self._cond:
+            if not self._cond.wait_for(
+                    lambda: self._closed or self._seq > self._consumed_seq, timeout):
+                return None
+            if self._seq <= self._consumed_seq:
+                return None
+            self._consumed_seq = self._seq
+            return self._seq, self._frame, self._timestamp
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    @property
+    def closed(self):
+        return self._closed
+
+
+class CaptureThread(threading.Thread):
+    """Continuously drains a cv2.VideoCapture into a FrameSlot.
+
+    Reading as fast as the camera delivers keeps the driver's internal
+    buffer empty, so the consumer always gets the freshest frame instead
+    of one that has been queued behind slow inference.
+
+    Frames are stamped with the driver's capture timestamp when it is on
+    the time.monotonic() clock (V4L2 on Linux), else with the time read()
+    returned. negotiated holds the settings the camera actually gave us.
+
+    Also serves as a CVEngine frame source: read(), finished, dropped.
+    """
+
+    def __init__(self, cam_index=0, slot=None, settings=None):
+        super().__init__(daemon=True)
+        self.cam_index = cam_index
+        self.slot = slot if slot is not None else FrameSlot()
+        self.settings = settings
+        self.negotiated = None
+        self.driver_lag_ms = None  # host time - driver time of the last frame
+        self.running = False
+        self.opened = threading.Event()
+        self._stop_event = threading.Event()  # set by stop(), even while still opening
+        self.frames_read = 0
+
+    def _timestamp(self, cap, now):
+        driver = cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+        if driver > 0 and 0 <= now - driver < DRIVER_CLOCK_TOLERANCE:
+            self.driver_lag_ms = (now - driver) * 1000.0
+            return driver, "driver"
+        return now, "host"
+
+    def run(self):
+        try:
+            cap = open_capture(self.cam_index, self.settings)
+        except ValueError as e:
+            print(e)
+            self.opened.set()
+            self.slot.close()
+            return
+        if self._stop_event.is_set():
+            # stop() came while the device was opening; let it go at once
+            cap.release()
+            self.opened.set()
+            self.slot.close()
+            return
+        self.running = cap.isOpened()
+        if self.running:
+            self.negotiated = negotiated_settings(cap)
+        self.opened.set()
+        try:
+            while self.running and not self._stop_event.is_set():
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                timestamp, clock = self._timestamp(cap, time.monotonic())
+                if self.frames_read == 0:
+                    self.negotiated["timestamps"] = clock
+                    print(f"Camera {self.cam_index}: {format_settings(self.negotiated)}")
+                self.frames_read += 1
+                self.slot.put(frame, timestamp)
+        finally:
+            cap.release()
+            self.running = False
+            self.slot.close()
+
+    def read(self, timeout=1.0):
+        """Newest unseen (frame, timestamp), or None on timeout / end of stream."""
+        item = self.slot.get(timeout)
+        if item is None:
+            return None
+        return item[1], item[2]
+
+    @property
+    def finished(self):
+        return self.slot.closed
+
+    @property
+    def dropped(self):
+        return self.slot.dropped
+
+    def stop(self):
+        self._stop_event.set()
+        self.running = False
+        if self.is_alive():
+            self.join()
@@ -0,0 +1,44 @@
+import threading
+import time
+
+
+class LatestValue:
+    """Coalescing single-value channel between threads.
+
+    The producer put()s as often as it likes; only the newest value is
+    kept, stamped with the time it was produced. The consumer take()s at
+    its own rate and never sees a backlog. Values replaced before anyone
+    took them are counted in superseded. A value may carry a
+    tracing.Trace, which travels with it to the consumer.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._value = None
+        self._timestamp = 0.0
+        self._trace = None
+        self._seq = 0
+        self._taken_seq = 0
+        self.superseded = 0
+
+    def put(self, value, timestamp=None, trace=None):
+        with self._lock:
+            if self._seq > self._taken_seq:
+                self.superseded += 1
+            self._value = value
+            self._timestamp = time.monotonic() if timestamp is None else timestamp
+            self._trace = trace
+            self._seq += 1
+
+    def take(self):
+        """Return (value, timestamp, trace) if a new value arrived since the last take, else None."""
+        with self._lock:
+            if self._seq == self._taken_seq:
+                return None
+            self._taken_seq = self._seq
+            return self._value, self._timestamp, self._trace
+
+    def peek(self):
+        """Return (seq, value, timestamp) of the newest value without consuming it."""
+        with self._lock:
+            return self._seq, self._value, self._timestamp
@@ -0,0 +1,100 @@
+import threading
+import time
+
+from tracing import ACK_INDEX
+
+
+class ControlLoop(threading.Thread):
+    """Fixed-rate servo output driven by the latest CV targets.
+
+    CV samples arrive whenever a frame finishes, so their spacing jitters
+    with inference time. This loop ticks at rate_hz on absolute deadlines,
+    interpolates from the previous CV sample to the newest one over the
+    measured sample interval, and hands the result to send(s, e, w),
+    which returns whether the command was actually written.
+    Output stops (the arm holds) if no new sample arrives for hold_after
+    seconds.
+
+    Clearing enabled keeps the loop draining samples without sending, so
+    output can be switched on and off instantly.
+
+    Targets identical to the last ones sent are not re-sent (a still arm
+    costs no serial bandwidth) except every refresh seconds.
+
+    With a tracing.LatencyTracer each sample's trace is completed on the
+    first tick that writes it, once send() has returned; with no Arduino
+    connected nothing is written and nothing is traced.
+    """
+
+    def __init__(self, source, send, rate_hz=10.0, hold_after=0.5, tracer=None, refresh=1.0):
+        super().__init__(daemon=True)
+        self.source = source      # channel.LatestValue of (s, e, w)
+        self.send = send
+        self.period = 1.0 / rate_hz
+        self.hold_after = hold_after
+        self.tracer = tracer
+        self.enabled = True
+        self.refresh = refresh
+        self.unchanged = 0        # ticks whose target matched the last send
+        self._last_sent = None
+        self._last_sent_at = 0.0
+        self.running = False
+        self.ticks = 0
+        self.overruns = 0         # ticks that started after their deadline
+        self._prev = None         # (values, timestamp, trace)
+        self._cur = None
+        self._cur_arrival = 0.0
+        self._trace = None        # trace of a sample not yet sent
+
+    def _sample(self, now):
+        latest = self.source.take()
+        if latest is not None:
+            self._prev = self._cur
+            self._cur = latest
+            self._cur_arrival = now
+            self._trace = latest[2]
+        if self._cur is None or now - self._cur_arrival > self.hold_after:
+            return None
+        if self._prev is None:
+            return self._cur[0]
+
+        (v0, t0, _), (v1, t1, _) = self._prev, self._cur
+        interval = t1 - t0
+        if interval <= 0:
+            return v1
+        a = min(1.0, (now - self._cur_arrival) / interval)
+        return tuple(p + (c - p) * a for p, c in zip(v0, v1))
+
+    def run(self):
+        self.running = True
+        deadline = time.monotonic()
+        while self.running:
+            now = time.monotonic()
+            target = self._sample(now)
+            if target is not None and self.enabled:
+                target = tuple(int(round(v)) for v in target)
+                if target == self._last_sent and now - self._last_sent_at < self.refresh:
+                    self.unchanged += 1
+                elif self.send(*target):
+                    self._last_sent = target
+                    self._last_sent_at = now
+                    if self._trace is not None and self.tracer is not None:
+                        self.tracer.complete(self._trace, now, time.monotonic(),
+                                             ack_angle=target[ACK_INDEX])
+            elif not self.enabled:
+                self._last_sent = None  # resend in full once re-enabled
+            self._trace = None  # only the first send of a sample is traced
+            self.ticks += 1
+
+            deadline += self.period
+            delay = deadline - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                self.overruns += 1
+                if delay < -self.period:
+                    # Fell more than a tick behind: resync instead of bursting
+                    deadline = time.monotonic()
+
+    def stop(self):
+        self.running = False
@@ -0,0 +1,628 @@
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+import mediapipe as mp
+
+from capture import CaptureThread
+from adaptive import AdaptiveController, TIERS, DEFAULT_TIER
+from frame_ring import FrameRing
+from channel import LatestValue
+from filters import make_filter
+from recording import SessionRecorder
+from instrument import make_profiler
+from tracing import Trace
+from pacing import FramePacer
+from motion import MotionGate
+from angles import (landmarks_to_array, arm_angles, RIGHT_HIP, RIGHT_SHOULDER,
+                    RIGHT_ELBOW, RIGHT_WRIST, HAND_WRIST)
+
+# One processed frame: capture timestamp, smoothed servo angles and the
+# lowest pose visibility over the right-arm landmarks used
+Record = namedtuple("Record", ["timestamp", "shoulder", "elbow", "wrist", "confidence"])
+
+# Everything the GUI needs to draw one frame's overlay. Coordinates are
+# normalised (0..1) so the overlay fits whatever size the preview is shown at.
+#   landmarks -> (33, 3) float32 pose landmarks: x, y, visibility
+#   joints    -> (4, 2) float32: hip, shoulder, elbow, wrist
+#   angles    -> (shoulder, elbow, wrist) servo angles after smoothing
+#   hud       -> status line text
+Overlay = namedtuple("Overlay", ["landmarks", "joints", "angles", "hud"])
+
+ARM_LANDMARKS = [RIGHT_HIP, RIGHT_SHOULDER, RIGHT_ELBOW, RIGHT_WRIST]
+
+
+def hand_roi_box(wrist, elbow, w, h, scale=2.5, min_size=96):
+    """Square pixel box (x0, y0, x1, y1) around the hand, or None.
+
+    wrist/elbow are normalised pose landmarks. The hand sits past the wrist
+    along the forearm and is roughly forearm-sized, so the box is centred a
+    little beyond the wrist and scaled by the forearm length.
+    """
+    wx, wy = wrist[0] * w, wrist[1] * h
+    ex, ey = elbow[0] * w, elbow[1] * h
+    forearm = float(np.hypot(wx - ex, wy - ey))
+    size = int(max(min_size, scale * forearm))
+    cx = wx + 0.5 * (wx - ex)
+    cy = wy + 0.5 * (wy - ey)
+    x0 = int(max(0, cx - size / 2))
+    y0 = int(max(0, cy - size / 2))
+    x1 = int(min(w, cx + size / 2))
+    y1 = int(min(h, cy + size / 2))
+    if x1 - x0 < min_size // 2 or y1 - y0 < min_size // 2:
+        return None
+    return x0, y0, x1, y1
+
+
+def map_hand_to_frame(hand_landmarks_list, box, w, h):
+    """Rewrite crop-normalised hand landmarks (in place) as full-frame normalised."""
+    x0, y0, x1, y1 = box
+    sx, sy = (x1 - x0) / w, (y1 - y0) / h
+    ox, oy = x0 / w, y0 / h
+    for hand in hand_landmarks_list:
+        for p in hand.landmark:
+            p.x = ox + p.x * sx
+            p.y = oy + p.y * sy
+
+
+def fit_size(frame, height, width=None):
+    """(width, height) of frame downscaled to at most height rows (and width
+    columns, if given), keeping aspect."""
+    h, w = frame.shape[:2]
+    scale = min(height / h if height else 1.0, width / w if width else 1.0)
+    if scale >= 1.0:
+        return w, h
+    return max(1, int(round(w * scale))), max(1, int(round(h * scale)))
+
+
+def fit_height(frame, height, dst=None, width=None):
+    """Downscale frame (keeping aspect) so it is at most height rows tall
+    (and width columns wide, if given).
+
+    With dst the result is written into that preallocated buffer instead.
+    """
+    size = fit_size(frame, height, width)
+    if size == (frame.shape[1], frame.shape[0]):
+        if dst is None:
+            return frame
+        np.copyto(dst, frame)
+        return dst
+    return cv2.resize(frame, size, dst=dst, interpolation=cv2.INTER_AREA)
+
+
+def map_wrist_to_servo(raw_signed_deg, inner_ref, outer_ref):
+    if abs(outer_ref - inner_ref) < 1e-3:
+        return 90.0
+    t = (raw_signed_deg - inner_ref) / (outer_ref - inner_ref)
+    return float(np.clip(t * 180.0, 0.0, 180.0))
+
+
+class CVEngine:
+    """Camera -> pose/hands -> servo angles, with no Qt dependency.
+
+    A frame source is anything with start(), read(timeout) returning
+    (frame, timestamp) or None, a finished flag, a dropped count and
+    stop(); by default a CaptureThread on cam_index. Use records() as an
+    iterator, run(callback) to push Records to a callback, or process() to
+    feed frames yourself. Servo targets also go to the servo_data channel,
+    and with preview=True frames plus overlays go to the frames ring.
+    """
+
+    def __init__(self, cam_index=0, source=None, parallel=True, hand_roi=False,
+                 hands=True, adaptive=False, target_fps=30.0, pace_fps=None, motion_gate=False,
+                 infer_height=None, display_height=None, display_width=None,
+                 filter_name="moving_average", filter_params=None,
+                 preview=True, preview_rgb=False, record_path=None, capture=None):
+        self.cam_index = cam_index
+        self.capture = capture  # capture.CaptureSettings for cameras we open
+        self.source = source
+        self._owns_source = source is None
+        self.parallel = parallel  # run Pose and Hands on separate threads
+        # Run Hands on a crop around the pose wrist. Crops go to their own
+        # static-image Hands: its box moves every frame, so a tracking
+        # instance would carry the last ROI into the wrong coordinates
+        self.hand_roi = hand_roi
+        self.hands = hands        # False skips the Hands model; the wrist holds at 90
+        self.roi_fallbacks = 0    # crops that lost the hand and re-ran full frame
+        # Adaptive quality: switch tiers to keep inference within 1/target_fps
+        self.controller = AdaptiveController(target_fps) if adaptive else None
+        self.tier = TIERS[DEFAULT_TIER]
+        self.infer_ms = 0.0
+        # Loop pacing: pace_fps caps the processing rate, None follows the camera
+        self.pacer = FramePacer(pace_fps)
+        # Skip inference on frames where nothing moved (see motion.py)
+        self.motion_gate = MotionGate() if motion_gate else None
+        self._last_results = None  # (pose, hands) reused while the gate skips
+        # Model input and preview sizes are independent of the camera's;
+        # None keeps the native resolution
+        self.infer_height = infer_height
+        self.display_height = display_height
+        self.display_width = display_width
+        # Preview frames for the GUI; polled with frames.latest() at display rate
+        self.frames = FrameRing() if preview else None
+        self.preview_rgb = preview_rgb  # swap preview to RGB for older Qt
+        # Overlay data published with each frame; the GUI draws it, not us
+        self.overlay_enabled = preview
+        # Newest (shoulder, elbow, wrist) servo targets; consumers drain it
+        # at their own rate instead of receiving a queued signal per frame
+        self.servo_data = LatestValue()
+        # Angle smoothing; swap at runtime with set_filter()
+        self.filter_name = filter_name
+        self.smoother = make_filter(filter_name, **(filter_params or {}))
+        self.running = False
+        # Set by stop(); unlike running it survives a records() that is
+        # still starting up, so a stop during open() is not lost
+        self._stop_requested = threading.Event()
+        # Paused keeps the source and models open but processes nothing
+        self.paused = False
+        self.lock = threading.Lock()  # protects calibration and the filter
+        self.inner_ref = -90.0
+        self.outer_ref = +90.0
+        self._last_raw_wrist_signed = None
+        self.dropped_frames = 0  # camera frames superseded before inference
+        self._dropped_base = 0   # dropped by cameras switched away from, less paused drops
+        self._pause_mark = None  # source.dropped when paused; None while running
+        # Hot camera switching: set_camera() opens the new device on a
+        # helper thread and the loop swaps it in between frames
+        self._pending_camera = None  # (cam_index, CaptureThread, request time)
+        self._switch_gen = 0
+        self.camera_switch_ms = None  # how long the last switch took
+        self.on_camera_switched = None  # callback(cam_index, ms, ok)
+        # Optional landmark session recording (see recording.py)
+        self.record_path = record_path
+        self.recorder = None
+        # Per-stage timings; NullProfiler when JIGNESS_PROFILE=0
+        self.profiler = make_profiler()
+        self.frame_id = 0  # trace ID of the last processed frame
+        self._pose = None
+        self._hands = None
+        self._roi_hands = None
+        self._executor = None
+
+    @property
+    def capture_info(self):
+        """Settings the camera negotiated (see capture.negotiated_settings), or None."""
+        return getattr(self.source, "negotiated", None)
+
+    # ---------------- Runtime controls ---------------- #
+    def set_filter(self, name, **params):
+        """Switch the angle filter (see filters.FILTERS) while running."""
+        smoother = make_filter(name, **params)
+        with self.lock:
+            self.smoother = smoother
+            self.filter_name = name
+
+    def set_camera(self, cam_index):
+        """Switch to another camera.
+
+        While running, the new device is opened in the background and
+        swapped in at the next frame boundary; models, filter and
+        calibration carry over. If it fails to open, the current camera
+        stays. Otherwise the index is just used at the next open().
+
+        Every request ends in one on_camera_switched call: ok=False for
+        one that failed, was superseded by a newer request, or cannot
+        apply because the source is not a camera we opened.
+        """
+        if not self._owns_source:
+            self._report_switch(cam_index, time.monotonic(), False)
+            return
+        if self.source is None:
+            self.cam_index = cam_index
+            return
+        with self.lock:
+            self._switch_gen += 1
+            gen = self._switch_gen
+        threading.Thread(target=self._open_camera, daemon=True,
+                         args=(cam_index, gen, time.monotonic())).start()
+
+    def _open_camera(self, cam_index, gen, requested):
+        source = CaptureThread(cam_index, settings=self.capture)
+        source.start()
+        source.opened.wait(5.0)
+        replaced = None
+        with self.lock:
+            current = gen == self._switch_gen and self.source is not None
+            if current and source.running:
+                replaced = self._pending_camera
+                self._pending_camera = (cam_index, source, requested)
+        if replaced is not None:
+            # Opened but superseded before the loop swapped it in
+            replaced[1].stop()
+            self._report_switch(replaced[0], replaced[2], False)
+        if not (current and source.running):
+            source.stop()
+            self._report_switch(cam_index, requested, False)
+
+    def _report_switch(self, cam_index, requested, ok):
+        if self.on_camera_switched is not None:
+            self.on_camera_switched(cam_index, (time.monotonic() - requested) * 1000.0, ok)
+
+    def _swap_camera(self):
+        with self.lock:
+            pending, self._pending_camera = self._pending_camera, None
+        if pending is None:
+            return
+        cam_index, source, requested = pending
+        old = self.source
+        with self.lock:
+            self._unmark_pause()
+            self._dropped_base += old.dropped
+            if self.paused:
+                self._pause_mark = 0
+        self.source = source
+        self.cam_index = cam_index
+        if self.motion_gate is not None:
+            self.motion_gate.reset()
+        # Joining the old capture thread waits for its last read; not here
+        threading.Thread(target=old.stop, daemon=True).start()
+        self.camera_switch_ms = (time.monotonic() - requested) * 1000.0
+        print(f"Switched to camera {cam_index} in {self.camera_switch_ms:.0f} ms")
+        self._report_switch(cam_index, requested, True)
+
+    def set_inner_calibration(self):
+        with self.lock:
+            if self._last_raw_wrist_signed is not None:
+                self.inner_ref = float(self._last_raw_wrist_signed)
+
+    def set_outer_calibration(self):
+        with self.lock:
+            if self._last_raw_wrist_signed is not None:
+                self.outer_ref = float(self._last_raw_wrist_signed)
+
+    def reset_calibration(self):
+        with self.lock:
+            self.inner_ref = -90.0
+            self.outer_ref = +90.0
+
+    # ---------------- Lifecycle ---------------- #
+    def _make_pose(self, complexity):
+        return mp.solutions.pose.Pose(model_complexity=complexity,
+                                      min_detection_confidence=0.6,
+                                      min_tracking_confidence=0.6)
+
+    def _make_hands(self, static=False):
+        return mp.solutions.hands.Hands(static_image_mode=static, max_num_hands=1,
+                                        min_detection_confidence=0.6,
+                                        min_tracking_confidence=0.6)
+
+    def open(self):
+        """Load the models and start the frame source."""
+        if self._owns_source:
+            # Camera is drained on its own thread; we always process the newest frame
+            self.source = CaptureThread(self.cam_index, settings=self.capture)
+        self.source.start()
+        self._dropped_base = 0
+        self._pause_mark = 0 if self.paused else None
+
+        if self.controller is not None:
+            self.tier = self.controller.tier
+        self._pose = self._make_pose(self.tier.complexity)
+        self._hands = self._roi_hands = None
+        if self.hands:
+            self._hands = self._make_hands()
+            if self.hand_roi:
+                self._roi_hands = self._make_hands(static=True)
+        # MediaPipe releases the GIL while a graph runs, so two threads are
+        # enough to overlap Pose and Hands on the same frame
+        self._executor = ThreadPoolExecutor(max_workers=2) if self.parallel else None
+
+        self._last_arm = None  # (wrist, elbow) from the most recent pose result
+        self._last_results = None
+        if self.motion_gate is not None:
+            self.motion_gate.reset()
+        self._hand_results = None
+        self._frame_count = 0
+        # Landmark arrays reused every frame by the angle kernel
+        self._pose_arr = np.empty((33, 3), dtype=np.float32)
+        self._hand_buf = np.empty((21, 3), dtype=np.float32)
+        self._vis_buf = np.empty(33, dtype=np.float32)
+        if self.record_path:
+            self.recorder = SessionRecorder(self.record_path)
+
+    def close(self):
+        with self.lock:
+            pending, self._pending_camera = self._pending_camera, None
+        if pending is not None:
+            pending[1].stop()
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        if self.source is not None:
+            self.source.stop()
+            if self._owns_source:
+                self.source = None
+        if self._hands is not None:
+            self._hands.close()
+            self._hands = None
+        if self._roi_hands is not None:
+            self._roi_hands.close()
+            self._roi_hands = None
+        if self._pose is not None:
+            self._pose.close()
+            self._pose = None
+
+    def stop(self):
+        """End records()/run(), also if they are still opening the camera and models."""
+        self._stop_requested.set()
+        self.running = False
+
+    def pause(self):
+        with self.lock:
+            if self._pause_mark is None and self.source is not None:
+                self._pause_mark = self.source.dropped
+        self.paused = True
+
+    def _unmark_pause(self):
+        # A paused loop reads nothing, so the source counts every frame
+        # until the first read after resume as dropped; those are not
+        # frames inference fell behind on
+        if self._pause_mark is not None:
+            self._dropped_base -= self.source.dropped - self._pause_mark
+            self._pause_mark = None
+
+    def resume(self):
+        """Continue after pause(); the filter restarts so old angles don't leak in."""
+        with self.lock:
+            self.smoother.reset()
+        if self.motion_gate is not None:
+            self.motion_gate.reset()
+        self.paused = False
+
+    def records(self):
+        """Yield a Record for every frame with a detected pose until stop()."""
+        try:
+            self.open()
+            self.running = not self._stop_requested.is_set()
+            self.pacer.reset()
+            prof = self.profiler
+            while self.running:
+                if self._pending_camera is not None:
+                    self._swap_camera()
+                if self.paused:
+                    if self.source.finished:
+                        break  # camera failed or was unplugged while paused
+                    self.pacer.reset()
+                    time.sleep(0.05)
+                    continue
+                t = time.perf_counter()
+                item = self.source.read(timeout=1.0)
+                if item is None:
+                    if self.source.finished:
+                        break
+                    continue
+                prof.record("capture", (time.perf_counter() - t) * 1000.0)
+                if self._pause_mark is not None and not self.paused:
+                    with self.lock:
+                        self._unmark_pause()
+                record = self.process(*item)
+                if record is not None:
+                    yield record
+
+                # Sleep only what is left of this frame's budget
+                prof.record("pace", self.pacer.wait() * 1000.0)
+        finally:
+            self.running = False
+            self._stop_requested.clear()  # the engine may run again
+            self.close()
+
+    def run(self, callback=None):
+        """Process frames until stop(), passing each Record to callback."""
+        for record in self.records():
+            if callback is not None:
+                callback(record)
+
+    # ---------------- Per-frame processing ---------------- #
+    def _process_hands(self, image_rgb, box):
+        if box is not None:
+            x0, y0, x1, y1 = box
+            crop = np.ascontiguousarray(image_rgb[y0:y1, x0:x1])
+            results = self._roi_hands.process(crop)
+            if results.multi_hand_landmarks:
+                ih, iw = image_rgb.shape[:2]
+                map_hand_to_frame(results.multi_hand_landmarks, box, iw, ih)
+                return results
+            self.roi_fallbacks += 1
+        return self._hands.process(image_rgb)
+
+    @staticmethod
+    def _arm_from(pose_results):
+        if not pose_results.pose_landmarks:
+            return None
+        plm = pose_results.pose_landmarks.landmark
+        wr = plm[RIGHT_WRIST]
+        el = plm[RIGHT_ELBOW]
+        return (wr.x, wr.y), (el.x, el.y)
+
+    def _infer(self, image_rgb):
+        """Run Pose (and Hands, on cadence) on one model-sized RGB frame."""
+        ih, iw = image_rgb.shape[:2]
+        self._frame_count += 1
+        run_hands = self._hands is not None and (
+            self._hand_results is None or self._frame_count % self.tier.hands_every == 0)
+
+        if self._executor is not None:
+            # Hands cannot wait for this frame's pose, so its ROI
+            # comes from the previous frame's wrist
+            box = None
+            if self.hand_roi and self._last_arm is not None:
+                box = hand_roi_box(*self._last_arm, iw, ih)
+            prof = self.profiler
+            pose_future = self._executor.submit(prof.timed, "pose", self._pose.process, image_rgb)
+            if run_hands:
+                hand_future = self._executor.submit(prof.timed, "hands",
+                                                    self._process_hands, image_rgb, box)
+                self._hand_results = hand_future.result()
+            pose_results = pose_future.result()
+            self._last_arm = self._arm_from(pose_results)
+        else:
+            pose_results = self.profiler.timed("pose", self._pose.process, image_rgb)
+            self._last_arm = self._arm_from(pose_results)
+            if run_hands:
+                box = None
+                if self.hand_roi and self._last_arm is not None:
+                    box = hand_roi_box(*self._last_arm, iw, ih)
+                self._hand_results = self.profiler.timed("hands", self._process_hands,
+                                                         image_rgb, box)
+        return pose_results, self._hand_results
+
+    def process(self, frame, frame_time):
+        """Process one BGR frame; returns a Record, or None if no pose was found."""
+        if self.source is not None:
+            self.dropped_frames = self._dropped_base + self.source.dropped
+
+        prof = self.profiler
+        prof.start()
+        t_infer = time.perf_counter()
+        self.frame_id += 1
+        trace = Trace(self.frame_id, frame_time)
+
+        # Landmarks are normalised, so the models can see a smaller
+        # frame than the preview; the overlay works in the preview's
+        # pixels regardless of what the models saw
+        native = frame
+        w, h = fit_size(native, self.display_height, self.display_width)
+        if self.frames is not None:
+            frame = fit_height(native, self.display_height, width=self.display_width,
+                               dst=self.frames.acquire((h, w, 3)))
+        infer_height = min((v for v in (self.tier.infer_height, self.infer_height) if v),
+                           default=None)
+        src = frame if infer_height and h >= infer_height else native
+
+        # A static scene keeps the previous landmarks instead of re-inferring
+        inferred = True
+        if self.motion_gate is not None and self._last_results is not None:
+            inferred = self.motion_gate.check(frame)
+            prof.mark("motion")
+
+        if inferred:
+            image_rgb = cv2.cvtColor(fit_height(src, infer_height), cv2.COLOR_BGR2RGB)
+            prof.mark("preprocess")
+            pose_results, hand_results = self._infer(image_rgb)
+            prof.mark("infer")
+            self._last_results = pose_results, hand_results
+            if self.motion_gate is not None and not pose_results.pose_landmarks:
+                self.motion_gate.set_region(None)
+        else:
+            pose_results, hand_results = self._last_results
+        trace.inferred = time.monotonic()
+
+        if inferred:
+            self.infer_ms = (time.perf_counter() - t_infer) * 1000.0
+            if self.controller is not None and self.controller.update(self.infer_ms):
+                old_complexity = self.tier.complexity
+                self.tier = self.controller.tier
+                if self.tier.complexity != old_complexity:
+                    self._pose.close()
+                    self._pose = self._make_pose(self.tier.complexity)
+
+        record = None
+        overlay = None
+        try:
+            record, overlay = self._angles(pose_results, hand_results, w, h, frame_time, trace)
+        except AttributeError:
+            # This is expected when no pose is detected. Silently pass.
+            pass
+        except Exception as e:
+            # Print any other unexpected errors to the console for debugging
+            print(f"Unexpected error in CVEngine: {e}")
+
+        if self.frames is not None:
+            # Hand the frame and its overlay to the GUI; the frame is
+            # already in the ring
+            if self.preview_rgb:
+                cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=frame)
+            self.frames.publish(overlay, frame_time)
+        prof.mark("publish")
+        prof.end("frame")
+        return record
+
+    def _angles(self, pose_results, hand_results, w, h, frame_time, trace):
+        pose_arr = self._pose_arr
+        lm = pose_results.pose_landmarks.landmark
+        landmarks_to_array(lm, out=pose_arr)
+        if self.motion_gate is not None:
+            self.motion_gate.set_region(pose_arr)
+        confidence = min(lm[i].visibility for i in ARM_LANDMARKS)
+
+        hand_arr = None
+        if hand_results is not None and hand_results.multi_hand_landmarks:
+            selected_hand = hand_results.multi_hand_landmarks[0]
+            if hand_results.multi_handedness:
+                for lms, handedness in zip(hand_results.multi_hand_landmarks, hand_results.multi_handedness):
+                    label = handedness.classification[0].label
+                    if label == 'Right':
+                        selected_hand = lms
+                        break
+
+            hand_arr = landmarks_to_array(selected_hand.landmark, out=self._hand_buf)
+
+        # Shoulder, elbow and signed wrist angle in one pass
+        shoulder_raw, elbow_raw, raw_wrist_signed = arm_angles(pose_arr, hand_arr, (w, h))
+        self.profiler.mark("angles")
+
+        # Write the last raw angle and read calibration/filter under the lock
+        with self.lock:
+            self._last_raw_wrist_signed = raw_wrist_signed
+            local_inner = self.inner_ref
+            local_outer = self.outer_ref
+            smoother = self.smoother
+
+        wrist_servo = 90.0
+        wrist_draw = pose_arr[RIGHT_WRIST, :2]
+        if hand_arr is not None:
+            wrist_servo = map_wrist_to_servo(raw_wrist_signed, local_inner, local_outer)
+            wrist_draw = hand_arr[HAND_WRIST, :2]
+
+        shoulder_angle, elbow_angle, wrist_servo = smoother([
+            np.clip(shoulder_raw, 0, 180),
+            np.clip(elbow_raw, 0, 180),
+            np.clip(wrist_servo, 0, 180)
+        ], frame_time)
+        self.profiler.mark("smoothing")
+        trace.smoothed = time.monotonic()
+
+        # Read once: the GUI may toggle it while this frame is being built
+        overlay_enabled = self.overlay_enabled
+        vis = None
+        if overlay_enabled or self.recorder is not None:
+            vis = self._vis_buf
+            for i, p in enumerate(lm):
+                vis[i] = p.visibility
+
+        if self.recorder is not None:
+            self.recorder.write(frame_time, (w, h), pose_arr, vis, hand_arr,
+                                (shoulder_raw, elbow_raw, raw_wrist_signed),
+                                (shoulder_angle, elbow_angle, wrist_servo),
+                                local_inner, local_outer)
+
+        overlay = None
+        if overlay_enabled:
+            gate = self.motion_gate
+            skipped = f"skipped: {gate.skip_ratio:.0%}  " if gate is not None else ""
+            hud = (f"Calib inner: {local_inner:.1f}  outer: {local_outer:.1f}  "
+                   f"raw_wrist: {raw_wrist_signed:.1f}  dropped: {self.dropped_frames}  "
+                   f"tier: {self.tier.name} ({self.infer_ms:.0f} ms)  "
+                   f"overruns: {self.pacer.overruns}  {skipped}"
+                   f"superseded: {self.servo_data.superseded}")
+            overlay = Overlay(
+                landmarks=np.column_stack((pose_arr[:, :2], vis)),
+                joints=np.vstack((pose_arr[[RIGHT_HIP, RIGHT_SHOULDER, RIGHT_ELBOW], :2],
+                                  wrist_draw)),
+                angles=(shoulder_angle, elbow_angle, wrist_servo),
+                hud=hud)
+        self.profiler.mark("overlay")
+
+        # Publish servo data
+        trace.published = time.monotonic()
+        self.servo_data.put((int(shoulder_angle), int(elbow_angle), int(wrist_servo)),
+                            frame_time, trace)
+        record = Record(frame_time, float(shoulder_angle), float(elbow_angle),
+                        float(wrist_servo), float(confidence))
+        return record, overlay
@@ -0,0 +1,425 @@
+import multiprocessing
+import pickle
+import queue
+import threading
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+from preview import PREVIEW_NEEDS_RGB
+from instrument import Profiler
+from tracing import Trace
+
+# Child-process CV mode. Capture and inference run in their own interpreter,
+# so they never compete with rendering and serial writes for the GUI's GIL.
+# Frames cross in a shared-memory ring and servo targets in a shared-memory
+# latest-value slot. Neither uses a lock between the processes: every slot
+# carries a generation counter that is odd while it is being written, and a
+# reader that sees it change skips or retries (a seqlock).
+
+
+def _attach(name):
+    # Spawned children share the parent's resource tracker, so attaching
+    # here does not make the child unlink the segment when it exits
+    return shared_memory.SharedMemory(name=name)
+
+
+class SharedFrameRing:
+    """frame_ring.FrameRing in shared memory, for a producer in another process.
+
+    The CV process acquire()s and publish()es exactly as with FrameRing.
+    The GUI process polls latest(), which copies the frame out and checks
+    that it was not overwritten meanwhile. Frames can be at most max_shape;
+    overlays are pickled into a fixed-size area beside each frame.
+    """
+
+    HEADER = 8        # int64: slots, max h, max w, latest, seq, reading
+    SLOT_HEADER = 6   # float64: generation, h, w, meta length, timestamp, spare
+    META_SIZE = 16384
+
+    def __init__(self, shm, created):
+        self.shm = shm
+        self._created = created
+        self._header = np.ndarray(self.HEADER, np.int64, buffer=shm.buf)
+        slots, max_h, max_w = (int(v) for v in self._header[:3])
+        self.max_shape = (max_h, max_w, 3)
+        frame_size = max_h * max_w * 3
+        slot_size = self.SLOT_HEADER * 8 + self.META_SIZE + frame_size
+        self._slots = []
+        for i in range(slots):
+            base = self.HEADER * 8 + i * slot_size
+            head = np.ndarray(self.SLOT_HEADER, np.float64, buffer=shm.buf, offset=base)
+            meta = np.ndarray(self.META_SIZE, np.uint8, buffer=shm.buf,
+                              offset=base + self.SLOT_HEADER * 8)
+            frame = np.ndarray(frame_size, np.uint8, buffer=shm.buf,
+                               offset=base + self.SLOT_HEADER * 8 + self.META_SIZE)
+            self._slots.append((head, meta, frame))
+        self._writing = None
+        self._local = None
+        self._local_stamp = 0.0
+
+    @classmethod
+    def create(cls, max_shape=(1080, 1920, 3), slots=3):
+        max_h, max_w = max_shape[:2]
+        size = cls.HEADER * 8 + slots * (cls.SLOT_HEADER * 8 + cls.META_SIZE + max_h * max_w * 3)
+        shm = shared_memory.SharedMemory(create=True, size=size)
+        header = np.ndarray(cls.HEADER, np.int64, buffer=shm.buf)
+        header[:] = (slots, max_h, max_w, -1, 0, -1, 0, 0)
+        del header
+        ring = cls(shm, created=True)
+        for head, _, _ in ring._slots:
+            head[:] = 0
+        return ring
+
+    @classmethod
+    def attach(cls, name):
+        return cls(_attach(name), created=False)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    # ---------------- Producer side ---------------- #
+    def acquire(self, shape):
+        """Return a writable (h, w, 3) uint8 view into a free slot."""
+        h, w = shape[:2]
+        if h > self.max_shape[0] or w > self.max_shape[1]:
+            raise ValueError(f"{w}x{h} frame does not fit the shared ring "
+                             f"({self.max_shape[1]}x{self.max_shape[0]})")
+        latest, reading = self._header[3], self._header[5]
+        n = len(self._slots)
+        start = 0 if self._writing is None else self._writing + 1
+        for i in range(n):
+            idx = (start + i) % n
+            if idx != latest and idx != reading:
+                break
+        head, _, frame = self._slots[idx]
+        if head[0] % 2 == 0:
+            head[0] += 1  # odd: being written
+        head[1], head[2] = h, w
+        self._writing = idx
+        return frame[:h * w * 3].reshape(h, w, 3)
+
+    def publish(self, meta=None, timestamp=0.0):
+        """Make the last acquired buffer the latest frame."""
+        if self._writing is None:
+            return
+        head, meta_buf, _ = self._slots[self._writing]
+        data = pickle.dumps(meta, pickle.HIGHEST_PROTOCOL) if meta is not None else b""
+        if len(data) > self.META_SIZE:
+            data = b""  # overlay too large to share; the frame still goes out
+        meta_buf[:len(data)] = np.frombuffer(data, np.uint8)
+        head[3] = len(data)
+        head[4] = timestamp
+        head[0] += 1  # even: complete
+        self._header[3] = self._writing
+        self._header[4] += 1
+        self._writing = None
+
+    # ---------------- Consumer side ---------------- #
+    def latest(self, since=0):
+        """Return (seq, frame, meta) if a frame newer than since exists, else None.
+
+        The frame is copied out of shared memory into a buffer that stays
+        valid until the next call. A frame overwritten while it was copied
+        is skipped; the next poll picks up its successor.
+        """
+        seq = int(self._header[4])
+        idx = int(self._header[3])
+        if idx < 0 or seq == since:
+            return None
+        self._header[5] = idx
+        head, meta_buf, frame = self._slots[idx]
+        gen = head[0]
+        if gen % 2:
+            return None
+        shape = (int(head[1]), int(head[2]), 3)
+        if self._local is None or self._local.shape != shape:
+            self._local = np.empty(shape, np.uint8)
+        self._local.reshape(-1)[:] = frame[:self._local.size]
+        data = bytes(meta_buf[:int(head[3])])
+        stamp = head[4]
+        if head[0] != gen:
+            return None  # torn: the producer reused the slot while we copied
+        self._local_stamp = stamp
+        return seq, self._local, pickle.loads(data) if data else None
+
+    @property
+    def seq(self):
+        return int(self._header[4])
+
+    @property
+    def reading_timestamp(self):
+        """Capture timestamp of the frame last returned by latest()."""
+        return self._local_stamp
+
+    def close(self):
+        # Views into the segment must go before it can be closed
+        self._header = self._slots = None
+        self.shm.close()
+        if self._created:
+            self.shm.unlink()
+
+
+class SharedLatestValue:
+    """channel.LatestValue in shared memory: one producer, one consumer process.
+
+    Holds (shoulder, elbow, wrist), the timestamp and the tracing stamps as
+    float64s behind a generation counter. take() retries a read that
+    overlapped a write, so neither side ever blocks. If the producer died
+    mid-write the slot never settles; reads give up after read_timeout
+    and take() reports nothing new.
+
+    The consumer stores the last seq it took in the segment, so the
+    producer can count superseded values as it puts them, like LatestValue;
+    both sides see the same count.
+    """
+
+    # generation, seq, s, e, w, timestamp, trace id (-1 = none),
+    # capture, inferred, smoothed, published, taken seq, superseded
+    FIELDS = 13
+
+    def __init__(self, shm, created, read_timeout=0.1):
+        self.shm = shm
+        self._created = created
+        self._slot = np.ndarray(self.FIELDS, np.float64, buffer=shm.buf)
+        self._taken_seq = 0
+        self.read_timeout = read_timeout
+
+    @classmethod
+    def create(cls):
+        shm = shared_memory.SharedMemory(create=True, size=cls.FIELDS * 8)
+        value = cls(shm, created=True)
+        value._slot[:] = 0
+        return value
+
+    @classmethod
+    def attach(cls, name):
+        return cls(_attach(name), created=False)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    @property
+    def superseded(self):
+        return int(self._slot[12])
+
+    def put(self, value, timestamp=None, trace=None):
+        slot = self._slot
+        if slot[1] > slot[11]:
+            slot[12] += 1  # the previous value was never taken
+        slot[0] += 1  # odd: being written
+        slot[2:5] = value
+        slot[5] = time.monotonic() if timestamp is None else timestamp
+        if trace is None:
+            slot[6] = -1
+        else:
+            slot[6:11] = (trace.id, trace.capture, trace.inferred, trace.smoothed, trace.published)
+        slot[1] += 1
+        slot[0] += 1
+
+    def _read(self):
+        """A consistent copy of the slot, or None if a write never finishes."""
+        deadline = None
+        while True:
+            gen = self._slot[0]
+            if gen % 2 == 0:
+                copy = self._slot.copy()
+                if self._slot[0] == gen:
+                    return copy
+            if deadline is None:
+                deadline = time.monotonic() + self.read_timeout
+            elif time.monotonic() > deadline:
+                return None  # the producer died mid-write
+            time.sleep(0)  # writer is mid-update; let it finish
+
+    def take(self):
+        """Return (value, timestamp, trace) if a new value arrived since the last take, else None."""
+        slot = self._read()
+        if slot is None:
+            return None
+        seq = int(slot[1])
+        if seq == self._taken_seq:
+            return None
+        self._taken_seq = seq
+        self._slot[11] = seq
+        trace = None
+        if slot[6] >= 0:
+            trace = Trace(int(slot[6]), slot[7])
+            trace.inferred, trace.smoothed, trace.published = slot[8:11]
+        return tuple(int(v) for v in slot[2:5]), slot[5], trace
+
+    def peek(self):
+        """Return (seq, value, timestamp) of the newest value without consuming it."""
+        slot = self._read()
+        if slot is None:
+            # seq is written last, so it is still that of the last whole value
+            return int(self._slot[1]), None, 0.0
+        return int(slot[1]), tuple(int(v) for v in slot[2:5]), slot[5]
+
+    def close(self):
+        self._slot = None
+        self.shm.close()
+        if self._created:
+            self.shm.unlink()
+
+
+class RemoteProfiler(Profiler):
+    """Profiler for the GUI side: its own stages plus the CV process's latest summary."""
+
+    def __init__(self, window=600):
+        super().__init__(window)
+        self.remote = {}
+
+    def summary(self):
+        return {**self.remote, **super().summary()}
+
+
+# ---------------- Child process ---------------- #
+def _serve_commands(engine, commands):
+    while True:
+        cmd = commands.get()
+        if cmd is None:
+            engine.stop()
+            return
+        kind, name, args, kwargs = cmd
+        if kind == "set":
+            setattr(engine, name, args[0])
+        else:
+            getattr(engine, name)(*args, **kwargs)
+
+
+def _report_status(engine, status, done, interval=0.5):
+    while not done.wait(interval):
+        status.put(("status", {"profile": engine.profiler.summary(),
+                               "capture_info": engine.capture_info,
+                               "dropped_frames": engine.dropped_frames}))
+
+
+def _child_main(cam_index, options, frames_name, angles_name, commands, status):
+    from cv_engine import CVEngine  # MediaPipe only loads in the child
+
+    engine = CVEngine(cam_index, preview=True, **options)
+    engine.frames = SharedFrameRing.attach(frames_name)
+    engine.servo_data = SharedLatestValue.attach(angles_name)
+    engine.on_camera_switched = lambda *args: status.put(("camera_switched", args))
+    done = threading.Event()
+    threading.Thread(target=_serve_commands, args=(engine, commands), daemon=True).start()
+    threading.Thread(target=_report_status, args=(engine, status, done), daemon=True).start()
+    try:
+        engine.run()
+    finally:
+        done.set()
+        engine.frames.close()
+        engine.servo_data.close()
+
+
+class CVProcess(QObject):
+    """CVWorker replacement that runs the CVEngine in a child process.
+
+    Same interface as CVWorker, so MainWindow can use either. Frames and
+    servo targets arrive through shared memory. Controls go to the child
+    over a queue, and the child reports status back every half second.
+    Preview frames larger than max_shape are downscaled to fit.
+    """
+
+    camera_switched = pyqtSignal(int, float, bool)
+    # Emitted once the child has exited, like QThread.finished
+    finished = pyqtSignal()
+
+    def __init__(self, cam_index=0, max_shape=(1080, 1920, 3), **options):
+        super().__init__()
+        ctx = multiprocessing.get_context("spawn")
+        self.frames = SharedFrameRing.create(max_shape)
+        self.servo_data = SharedLatestValue.create()
+        self.profiler = RemoteProfiler()
+        self.capture_info = None
+        self.dropped_frames = 0
+        self._overlay_enabled = True
+        self._commands = ctx.Queue()
+        self._status = ctx.Queue()
+        options = dict(options, preview_rgb=PREVIEW_NEEDS_RGB)
+        # Fit the preview inside the shared ring in both dimensions
+        options["display_height"] = min(options.get("display_height") or max_shape[0], max_shape[0])
+        options["display_width"] = min(options.get("display_width") or max_shape[1], max_shape[1])
+        self._process = ctx.Process(target=_child_main, daemon=True, args=(
+            cam_index, options, self.frames.name, self.servo_data.name,
+            self._commands, self._status))
+        self._poll_timer = QTimer(self)
+        self._poll_timer.setInterval(100)
+        self._poll_timer.timeout.connect(self._poll)
+
+    def _call(self, name, *args, **kwargs):
+        self._commands.put(("call", name, args, kwargs))
+
+    def _poll(self):
+        while True:
+            try:
+                kind, payload = self._status.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "status":
+                self.profiler.remote = payload["profile"]
+                self.capture_info = payload["capture_info"]
+                self.dropped_frames = payload["dropped_frames"]
+            elif kind == "camera_switched":
+                self.camera_switched.emit(*payload)
+        if self._poll_timer.isActive() and not self._process.is_alive():
+            self._poll_timer.stop()
+            self.finished.emit()
+
+    def isRunning(self):
+        return self._process.is_alive()
+
+    @property
+    def overlay_enabled(self):
+        return self._overlay_enabled
+
+    @overlay_enabled.setter
+    def overlay_enabled(self, enabled):
+        self._overlay_enabled = enabled
+        self._commands.put(("set", "overlay_enabled", (enabled,), {}))
+
+    def set_filter(self, name, **params):
+        self._call("set_filter", name, **params)
+
+    def set_camera(self, cam_index):
+        self._call("set_camera", cam_index)
+
+    def set_inner_calibration(self):
+        self._call("set_inner_calibration")
+
+    def set_outer_calibration(self):
+        self._call("set_outer_calibration")
+
+    def reset_calibration(self):
+        self._call("reset_calibration")
+
+    def pause(self):
+        self._call("pause")
+
+    def resume(self):
+        self._call("resume")
+
+    def start(self):
+        self._process.start()
+        self._poll_timer.start()
+
+    def stop(self):
+        self._commands.put(None)
+
+    def wait(self, timeout=10.0):
+        """Wait for the child to exit (killing it after timeout) and free shared memory."""
+        deadline = time.monotonic() + timeout
+        while self._process.is_alive() and time.monotonic() < deadline:
+            self._poll()  # a child blocked on a full status queue cannot exit
+            self._process.join(0.1)
+        if self._process.is_alive():
+            self._process.terminate()
+            self._process.join()
+        self._poll_timer.stop()
+        self.frames.close()
+        self.servo_data.close()
@@ -0,0 +1,132 @@
+import math
+import numpy as np
+
+# Streaming filters for the (shoulder, elbow, wrist) servo angles.
+# Each filter is called once per sample as f(values, t) with all joints at
+# once and returns the filtered values as a float array. Per-sample cost is
+# O(1) in the window size and no arrays are allocated beyond the result.
+
+
+class MovingAverage:
+    """Running-sum moving average over the last window samples."""
+
+    def __init__(self, window=7, size=3):
+        self.window = window
+        self._buf = np.zeros((window, size))
+        self._sum = np.zeros(size)
+        self._count = 0
+        self._i = 0
+        self._since_resync = 0
+
+    def __call__(self, values, t=None):
+        if self._count == self.window:
+            self._sum -= self._buf[self._i]
+        else:
+            self._count += 1
+        self._buf[self._i] = values
+        self._sum += self._buf[self._i]
+        self._i = (self._i + 1) % self.window
+
+        # Recompute now and then so float error in the running sum can't creep
+        self._since_resync += 1
+        if self._since_resync >= 1000:
+            self._sum = self._buf[:self._count].sum(axis=0)
+            self._since_resync = 0
+        return self._sum / self._count
+
+    def reset(self):
+        self._sum[:] = 0.0
+        self._count = 0
+        self._i = 0
+
+
+class ExponentialFilter:
+    """Single-pole low-pass: y += alpha * (x - y)."""
+
+    def __init__(self, alpha=0.35, size=3):
+        self.alpha = alpha
+        self._y = np.zeros(size)
+        self._primed = False
+
+    def __call__(self, values, t=None):
+        if not self._primed:
+            self._y[:] = values
+            self._primed = True
+        else:
+            self._y += self.alpha * (np.asarray(values, dtype=float) - self._y)
+        return self._y.copy()
+
+    def reset(self):
+        self._primed = False
+
+
+class OneEuroFilter:
+    """One Euro filter (Casiez et al., CHI 2012).
+
+    Heavy smoothing while the arm is still, less lag as it speeds up:
+    the cutoff rises with the filtered speed, min_cutoff + beta * |dx|.
+    Units are degrees and seconds.
+    """
+
+    def __init__(self, min_cutoff=1.0, beta=0.02, d_cutoff=1.0, size=3):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self._x = np.zeros(size)
+        self._dx = np.zeros(size)
+        self._t = None
+
+    @staticmethod
+    def _alpha(cutoff, dt):
+        tau = 1.0 / (2.0 * math.pi * cutoff)
+        return 1.0 / (1.0 + tau / dt)
+
+    def __call__(self, values, t):
+        x = np.asarray(values, dtype=float)
+        if self._t is None:
+            self._x[:] = x
+            self._dx[:] = 0.0
+            self._t = t
+            return self._x.copy()
+
+        dt = t - self._t
+        if dt <= 0:
+            return self._x.copy()
+        self._t = t
+
+        dx = (x - self._x) / dt
+        self._dx += self._alpha(self.d_cutoff, dt) * (dx - self._dx)
+        cutoff = self.min_cutoff + self.beta * np.abs(self._dx)
+        self._x += self._alpha(cutoff, dt) * (x - self._x)
+        return self._x.copy()
+
+    def reset(self):
+        self._t = None
+
+
+class Passthrough:
+    """No filtering; lowest latency, all the jitter."""
+
+    def __init__(self, size=3):
+        pass
+
+    def __call__(self, values, t=None):
+        return np.asarray(values, dtype=float)
+
+    def reset(self):
+        pass
+
+
+FILTERS = {
+    "moving_average": MovingAverage,
+    "exponential": ExponentialFilter,
+    "one_euro": OneEuroFilter,
+    "none": Passthrough,
+}
+
+
+def make_filter(name, **params):
+    """Build a filter by name (see FILTERS). Raises ValueError for unknown names."""
+    if name not in FILTERS:
+        raise ValueError(f"Unknown filter '{name}', expected one of {', '.join(FILTERS)}")
+    return FILTERS[name](**params)
@@ -0,0 +1,71 @@
+import threading
+import numpy as np
+
+
+class FrameRing:
+    """Preallocated triple buffer for handing preview frames to the GUI.
+
+    The worker acquire()s a buffer, draws into it and publish()es it; the
+    GUI asks for latest() at display rate. A buffer that is published or
+    being read is never handed out for writing, so neither side copies or
+    allocates image data per frame. The sequence number lets the GUI skip
+    rendering when nothing new has arrived. Each published frame can carry
+    a small metadata object (the overlay) and its capture timestamp.
+    """
+
+    def __init__(self, slots=3):
+        self._lock = threading.Lock()
+        self._buffers = [None] * slots
+        self._meta = [None] * slots
+        self._stamps = [0.0] * slots
+        self._writing = None
+        self._latest = None
+        self._reading = None
+        self._seq = 0
+
+    def acquire(self, shape):
+        """Return a writable uint8 buffer of the given shape."""
+        with self._lock:
+            n = len(self._buffers)
+            start = 0 if self._writing is None else self._writing + 1
+            for i in range(n):
+                idx = (start + i) % n
+                if idx != self._latest and idx != self._reading:
+                    break
+            buf = self._buffers[idx]
+            if buf is None or buf.shape != shape:
+                # Only happens on the first frames or a resolution change
+                buf = self._buffers[idx] = np.empty(shape, dtype=np.uint8)
+            self._writing = idx
+            return buf
+
+    def publish(self, meta=None, timestamp=0.0):
+        """Make the last acquired buffer the latest frame."""
+        with self._lock:
+            if self._writing is None:
+                return
+            self._meta[self._writing] = meta
+            self._stamps[self._writing] = timestamp
+            self._latest = self._writing
+            self._seq += 1
+
+    def latest(self, since=0):
+        """Return (seq, buffer, meta) if a frame newer than since exists, else None.
+
+        The returned buffer stays valid until the next call to latest().
+        """
+        with self._lock:
+            if self._latest is None or self._seq == since:
+                return None
+            self._reading = self._latest
+            return self._seq, self._buffers[self._latest], self._meta[self._latest]
+
+    @property
+    def seq(self):
+        return self._seq
+
+    @property
+    def reading_timestamp(self):
+        """Capture timestamp of the buffer last returned by latest()."""
+        with self._lock:
+            return 0.0 if self._reading is None else self._stamps[self._reading]
@@ -0,0 +1,217 @@
+"""Run the camera -> pose -> servo pipeline without the GUI.
+
+    python headless.py --camera 0 --port COM3 --rate 10 --filter one_euro
+
+    python headless.py --source session.mp4 --realtime
+
+Prints throughput/latency stats every few seconds. --preview opens an
+OpenCV window with the arm overlay (press q or Esc to quit).
+"""
+import argparse
+import os
+import threading
+import time
+
+import cv2
+import numpy as np
+
+import robot_functions as rf
+from cv_engine import CVEngine
+from control_loop import ControlLoop
+from filters import FILTERS
+from sources import open_source
+from capture import add_capture_args, settings_from_args
+from tracing import LatencyTracer
+
+
+class Stats:
+    """Accumulates per-record numbers between stats printouts."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.records = 0
+        self.latency_ms = []
+        self.since = time.monotonic()
+
+    def add(self, record):
+        latency = (time.monotonic() - record.timestamp) * 1000.0
+        with self.lock:
+            self.records += 1
+            self.latency_ms.append(latency)
+
+    def take(self):
+        """Return (records/s, latencies) since the last take and reset."""
+        with self.lock:
+            now = time.monotonic()
+            rate = self.records / max(now - self.since, 1e-9)
+            latencies = self.latency_ms
+            self.records = 0
+            self.latency_ms = []
+            self.since = now
+        return rate, latencies
+
+
+def print_stats(engine, loop, stats, tracer=None):
+    rate, latencies = stats.take()
+    if latencies:
+        lat = np.asarray(latencies)
+        lat_text = (f"latency p50 {np.percentile(lat, 50):.0f} ms"
+                    f" p95 {np.percentile(lat, 95):.0f} ms")
+    else:
+        lat_text = "no pose"
+    line = (f"[cv] {rate:5.1f} rec/s  infer {engine.infer_ms:.0f} ms  {lat_text}  "
+            f"tier {engine.tier.name}  dropped {engine.dropped_frames}  "
+            f"superseded {engine.servo_data.superseded}")
+    gate = engine.motion_gate
+    if gate is not None:
+        line += f"  static skipped {gate.skipped}/{gate.checked} ({gate.skip_ratio:.0%})"
+    if engine.pacer.period is not None:
+        line += f"  pace overruns {engine.pacer.overruns}"
+    if loop is not None:
+        line += f"  ctl ticks {loop.ticks} overruns {loop.overruns} unchanged {loop.unchanged}"
+    print(line, flush=True)
+    profile = engine.profiler.format_line()
+    if profile:
+        print(f"[cv] {profile}", flush=True)
+    e2e = tracer.format_line() if tracer is not None else ""
+    if e2e:
+        print(f"[cv] {e2e}", flush=True)
+
+
+def draw_preview(frame, overlay):
+    """Minimal OpenCV rendering of the engine overlay for the preview window."""
+    if overlay is None:
+        return
+    h, w = frame.shape[:2]
+    pts = [(int(x * w), int(y * h)) for x, y in overlay.joints]
+    for a, b in zip(pts, pts[1:]):
+        cv2.line(frame, a, b, (255, 0, 0), 3)
+    for p, angle in zip(pts[1:], overlay.angles):
+        cv2.putText(frame, f"{int(angle)}", (p[0] + 20, p[1] - 20),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+    cv2.putText(frame, overlay.hud, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 50, 50), 1)
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="Headless vision-driven arm control")
+    p.add_argument("--camera", type=int, default=0, help="camera index (default 0)")
+    p.add_argument("--source", default=None,
+                   help="replay instead of a camera: video file, image directory or 'synthetic[:WxH]'")
+    p.add_argument("--realtime", action="store_true",
+                   help="pace --source at its frame rate instead of as fast as possible")
+    p.add_argument("--port", default=None,
+                   help="Arduino serial port, e.g. COM3 or /dev/ttyACM0; omit for a dry run")
+    p.add_argument("--baud", type=int, default=9600, help="serial baud rate (default 9600)")
+    p.add_argument("--rate", type=float, default=10.0,
+                   help="servo command rate in Hz (default 10; the firmware's replies to "
+                        "each command saturate 9600 baud above about 14)")
+    p.add_argument("--filter", default="moving_average", choices=list(FILTERS),
+                   help="angle filter (default moving_average)")
+    p.add_argument("--preview", action="store_true", help="show an OpenCV preview window")
+    p.add_argument("--stats", type=float, default=5.0, help="seconds between stats lines (default 5)")
+    p.add_argument("--fps", type=float, default=None,
+                   help="cap processing at this frame rate (default: follow the camera)")
+    p.add_argument("--infer-height", type=int, default=None,
+                   help="model input height, e.g. 480 (default: camera height)")
+    p.add_argument("--display-height", type=int, default=None,
+                   help="--preview height, e.g. 720 (default: camera height)")
+    p.add_argument("--hand-roi", action="store_true",
+                   help="run Hands on a crop around the pose wrist instead of the full frame")
+    p.add_argument("--adaptive", action="store_true", help="adapt model quality to the frame budget")
+    p.add_argument("--motion-gate", action="store_true",
+                   help="reuse the last landmarks while the scene is static")
+    p.add_argument("--profile-out", default=None, metavar="PATH",
+                   help="write per-stage timings on exit (.json or .csv); glass-to-serial "
+                        "latency goes next to it as PATH_e2e")
+    p.add_argument("--record", default=None, metavar="PATH",
+                   help="append landmarks and angles to a session file (see recording.py)")
+    add_capture_args(p)
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    rf.verbose = False  # stats lines replace the per-command echo
+
+    source = open_source(args.source, realtime=args.realtime) if args.source else None
+    engine = CVEngine(args.camera, source=source, preview=args.preview, filter_name=args.filter,
+                      infer_height=args.infer_height, display_height=args.display_height,
+                      adaptive=args.adaptive, pace_fps=args.fps,
+                      motion_gate=args.motion_gate, hand_roi=args.hand_roi,
+                      record_path=args.record, capture=settings_from_args(args))
+    stats = Stats()
+    errors = []
+
+    def run_engine():
+        try:
+            engine.run(stats.add)
+        except Exception as e:
+            errors.append(e)
+
+    cv_thread = threading.Thread(target=run_engine, daemon=True)
+
+    loop = None
+    tracer = LatencyTracer()
+    if args.port:
+        if not rf.connect_arduino(args.port, args.baud):
+            return 1
+        rf.start_reader(tracer.on_serial_line)
+        loop = ControlLoop(engine.servo_data, rf.send_cv_angles, rate_hz=args.rate,
+                           tracer=tracer)
+    else:
+        print("No --port given: running without sending to the arm")
+
+    cv_thread.start()
+    if loop is not None:
+        loop.start()
+
+    next_stats = time.monotonic() + args.stats
+    last_seq = 0
+    quit_early = False  # the user ended the run, not the pipeline
+    try:
+        while cv_thread.is_alive():
+            if args.preview:
+                latest = engine.frames.latest(last_seq)
+                if latest is not None:
+                    last_seq, buf, overlay = latest
+                    frame = buf.copy()
+                    draw_preview(frame, overlay)
+                    cv2.imshow("Jigness_bot", frame)
+                if cv2.waitKey(15) & 0xFF in (ord("q"), 27):
+                    quit_early = True
+                    break
+            else:
+                time.sleep(0.1)
+            if time.monotonic() >= next_stats:
+                print_stats(engine, loop, stats, tracer)
+                next_stats += args.stats
+    except KeyboardInterrupt:
+        quit_early = True
+    finally:
+        if loop is not None:
+            loop.stop()
+            loop.join()
+        engine.stop()
+        cv_thread.join(timeout=5.0)
+        if args.preview:
+            cv2.destroyAllWindows()
+        if args.profile_out:
+            stem, ext = os.path.splitext(args.profile_out)
+            if ext == ".csv":
+                engine.profiler.dump_csv(args.profile_out)
+                tracer.profiler.dump_csv(stem + "_e2e" + ext)
+            else:
+                engine.profiler.dump_json(args.profile_out)
+                tracer.profiler.dump_json(stem + "_e2e" + ext)
+    if errors:
+        print(f"CV pipeline failed: {type(errors[0]).__name__}: {errors[0]}")
+        return 1
+    if engine.frame_id == 0 and not quit_early:
+        what = f"--source {args.source}" if args.source else f"camera {args.camera}"
+        print(f"No frames from {what}: could not be opened or delivered nothing")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,177 @@
+import csv
+import json
+import os
+import sys
+import threading
+import time
+import numpy as np
+
+# Per-stage pipeline timing. Set JIGNESS_PROFILE=0 to switch it off: the
+# engine then gets NULL_PROFILER, whose methods do nothing.
+PROFILE = os.environ.get("JIGNESS_PROFILE", "1") != "0"
+
+PERCENTILES = (50, 95, 99)
+
+
+class _Ring:
+    """Last `window` samples of one stage, in milliseconds."""
+
+    def __init__(self, window):
+        self.values = np.zeros(window)
+        self.i = 0
+        self.count = 0  # total samples ever, not capped at window
+
+    def add(self, ms):
+        self.values[self.i] = ms
+        self.i = (self.i + 1) % len(self.values)
+        self.count += 1
+
+    def window(self):
+        return self.values[:min(self.count, len(self.values))]
+
+
+class Profiler:
+    """Monotonic stage timers feeding rolling latency windows.
+
+    On the thread that owns a frame call start(), then mark(stage) at the
+    end of each stage; each mark records the time since the previous one.
+    Work timed on other threads uses record(stage, ms) or timed().
+    Percentiles are computed only when a summary is asked for.
+    """
+
+    def __init__(self, window=600):
+        self.window = window
+        self._rings = {}
+        self._lock = threading.Lock()
+        self._t0 = 0.0
+        self._t = 0.0
+
+    def start(self):
+        self._t0 = self._t = time.perf_counter()
+
+    def mark(self, stage):
+        now = time.perf_counter()
+        self.record(stage, (now - self._t) * 1000.0)
+        self._t = now
+
+    def end(self, stage="frame"):
+        """Record the total time since start() under stage."""
+        self.record(stage, (time.perf_counter() - self._t0) * 1000.0)
+
+    def record(self, stage, ms):
+        ring = self._rings.get(stage)
+        if ring is None:
+            with self._lock:
+                ring = self._rings.setdefault(stage, _Ring(self.window))
+        ring.add(ms)
+
+    def timed(self, stage, fn, *args):
+        """Call fn(*args), recording its duration under stage."""
+        t = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            self.record(stage, (time.perf_counter() - t) * 1000.0)
+
+    def summary(self):
+        """{stage: {count, mean, p50, p95, p99, max}} over the current windows."""
+        out = {}
+        for stage, ring in list(self._rings.items()):
+            values = ring.window()
+            if len(values) == 0:
+                continue
+            p = np.percentile(values, PERCENTILES)
+            out[stage] = {
+                "count": ring.count,
+                "mean": float(values.mean()),
+                **{f"p{q}": float(v) for q, v in zip(PERCENTILES, p)},
+                "max": float(values.max()),
+            }
+        return out
+
+    def format_line(self, stages=None):
+        """Compact 'stage p50/p95 ms' text for a HUD or status bar."""
+        summary = self.summary()
+        stages = stages or list(summary)
+        parts = [f"{s} {summary[s]['p50']:.1f}/{summary[s]['p95']:.1f}"
+                 for s in stages if s in summary]
+        return "  ".join(parts) + ("  (p50/p95 ms)" if parts else "")
+
+    def dump_json(self, path):
+        with open(path, "w") as f:
+            json.dump(self.summary(), f, indent=2)
+
+    def dump_csv(self, path):
+        fields = ["stage", "count", "mean"] + [f"p{q}" for q in PERCENTILES] + ["max"]
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=fields)
+            writer.writeheader()
+            for stage, row in self.summary().items():
+                writer.writerow({"stage": stage, **row})
+
+
+class NullProfiler:
+    """Drop-in Profiler that records nothing."""
+
+    def start(self):
+        pass
+
+    def mark(self, stage):
+        pass
+
+    def end(self, stage="frame"):
+        pass
+
+    def record(self, stage, ms):
+        pass
+
+    def timed(self, stage, fn, *args):
+        return fn(*args)
+
+    def summary(self):
+        return {}
+
+    def format_line(self, stages=None):
+        return ""
+
+    def dump_json(self, path):
+        pass
+
+    def dump_csv(self, path):
+        pass
+
+
+NULL_PROFILER = NullProfiler()
+
+
+def make_profiler(window=600):
+    return Profiler(window) if PROFILE else NULL_PROFILER
+
+
+# ---------------- Process memory ---------------- #
+def rss_mb():
+    """Current resident set size of this process in MiB, or None if unknown."""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 2 ** 20
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MiB, or None if unknown."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        try:
+            import psutil
+        except ImportError:
+            return None
+        return psutil.Process().memory_info().peak_wset / 2 ** 20
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (2 ** 20 if sys.platform == "darwin" else 2 ** 10)
@@ -1,10 +1,18 @@
 import sys
-from PyQt5.QtWidgets import QApplication, QMainWindow
-from PyQt5.QtGui import QPixmap
+import time
+import argparse
+from PyQt5.QtWidgets import QApplication, QMainWindow, QShortcut, QLabel
+from PyQt5.QtGui import QPixmap, QImage, QPainter, QKeySequence
 from PyQt5.QtCore import QTimer  # <-- Import QTimer
 from Controller4 import Ui_MainWindow
 import robot_functions as rf
-from cv_worker import CVWorker
+from preview import PREVIEW_FORMAT
+from cv_process import CVProcess
+from overlay import draw_overlay
+from control_loop import ControlLoop
+from filters import FILTERS
+from tracing import LatencyTracer
+from capture import add_capture_args, settings_from_args, format_settings
 
 class MainWindow(QMainWindow, Ui_MainWindow):
     def __init__(self):
@@ -12,11 +20,63 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         self.setupUi(self)
 
         # --- Rate-limit video updates to prevent UI crash ---
-        self.latest_frame = None
+        # Frames are polled from the worker's ring; nothing is queued per frame
+        self.last_frame_seq = 0
         self.video_update_timer = QTimer(self)
         self.video_update_timer.setInterval(33)  # ~30 FPS
         self.video_update_timer.timeout.connect(self.render_latest_frame)
         self.video_update_timer.start()
+
+        # Skeleton/HUD overlay is painted here at display rate; "O" toggles it
+        self.show_overlay = True
+        QShortcut(QKeySequence("O"), self, activated=self.toggle_overlay)
+
+        # Angle filter, trading jitter against latency; "F" cycles through them
+        self.filter_name = "moving_average"
+        QShortcut(QKeySequence("F"), self, activated=self.cycle_filter)
+
+        # Pipeline stage timings in a permanent status bar label, so event
+        # messages (showMessage) are not overwritten; "P" dumps them to JSON/CSV
+        self.profile_label = QLabel(self)
+        self.statusbar.addPermanentWidget(self.profile_label)
+        self.profile_timer = QTimer(self)
+        self.profile_timer.setInterval(1000)
+        self.profile_timer.timeout.connect(self.show_profile)
+        self.profile_timer.start()
+        QShortcut(QKeySequence("P"), self, activated=self.dump_profile)
+
+        # Servo targets go out from a fixed-rate control loop that samples the
+        # worker's latest-value channel; it only sends in Start (not View) mode
+        self.control_loop = None
+        # At 9600 baud (~960 B/s each way) the firmware's 22-byte
+        # "Moved servo N to A" reply to each of the 3 commands per tick is
+        # the limit: 10 Hz is 660 B/s back, leaving headroom so the
+        # Arduino never blocks in Serial.print and overruns its RX buffer
+        self.control_rate_hz = 10.0
+        # Callable returning a frame source (see sources.py) to use instead
+        # of the selected camera; the soak test sets it
+        self.source_factory = None
+        # Requested camera settings (capture.CaptureSettings); "C" shows
+        # what the camera actually negotiated
+        self.capture_settings = None
+        # Run capture and inference in a child process (see cv_process.py)
+        self.process_mode = False
+        # Skip inference while the operator holds still (see motion.py)
+        self.motion_gate = False
+        # Run Hands on a crop around the pose wrist (see CVEngine.hand_roi)
+        self.hand_roi = False
+        # Switch quality tiers to keep inference within the frame budget
+        # (see adaptive.py); the HUD shows the current tier
+        self.adaptive = False
+        # Model input and preview heights; None keeps the camera's
+        self.infer_height = None
+        self.display_height = None
+        QShortcut(QKeySequence("C"), self, activated=self.show_capture_info)
+        # Processing rate cap for the worker; None follows the camera
+        self.pace_fps = None
+        # Capture -> serial write latency of every sample sent, plus the
+        # firmware's echo when connected; shown with the stage timings
+        self.tracer = LatencyTracer()
         # ----------------------------------------------------
 
         # ===== Step sliders =====
@@ -58,7 +118,11 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         self.rot_neg.released.connect(rf.stop_br)
 
         # ===== Computer Vision =====
+        # One long-lived worker keeps the models and camera warm; Start,
+        # View and Stop only pause it and switch servo output on or off
         self.cv_worker = None
+        self.mode = "stopped"
+        QTimer.singleShot(0, self.ensure_worker)
 
         self.innerBtn.clicked.connect(self.set_inner_calib)
         self.outerBtn.clicked.connect(self.set_outer_calib)
@@ -77,49 +141,161 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         self.connect_btn.clicked.connect(self.connect_arduino)
 
     def start_cv(self):
-        if self.cv_worker:
-            self.cv_worker.stop()
-            self.cv_worker.wait()
-        cam_index = self.cam_select.currentIndex()
-        self.cv_worker = CVWorker(cam_index)
-        self.cv_worker.frame_ready.connect(self.update_video)
-        self.cv_worker.servo_data.connect(self.send_servo)   # sends to Arduino
-        self.cv_worker.start()
+        # sends to Arduino
+        self.set_mode("start")
 
     def start_view(self):
         """Start CV in preview mode: show frames and angles but do NOT send to Arduino."""
-        if self.cv_worker:
-            self.cv_worker.stop()
-            self.cv_worker.wait()
-        cam_index = self.cam_select.currentIndex()
-        self.cv_worker = CVWorker(cam_index)
-        self.cv_worker.frame_ready.connect(self.update_video)
-        # intentionally do NOT connect servo_data -> send_servo
-        self.cv_worker.start()
+        self.set_mode("view")
 
     def stop_cv(self):
-        if self.cv_worker:
-            self.cv_worker.stop()
-            self.cv_worker.wait()
-            self.cv_worker = None
+        self.set_mode("stopped")
+
+    def set_mode(self, mode):
+        """Switch between "stopped", "view" and "start"; nothing is reloaded."""
+        self.mode = mode
+        if mode == "stopped":
+            if self.control_loop:
+                self.control_loop.enabled = False
+            if self.cv_worker:
+                self.cv_worker.pause()
+            return
+        self.ensure_worker()
+        self.control_loop.enabled = mode == "start"
+        self.cv_worker.resume()
+
+    def ensure_worker(self):
+        """Start the worker (paused) and its control loop if they are not running."""
+        if self.cv_worker is not None:
+            if self.cv_worker.isRunning():
+                return
+            # The camera failed to open or stopped delivering and the
+            # worker ended; start over with a fresh one
+            self.shutdown_cv()
+        self.cv_worker = self.new_worker()
+        self.cv_worker.pause()
+        self.cv_worker.start()
+        self.control_loop = ControlLoop(self.cv_worker.servo_data, self.send_servo,
+                                        rate_hz=self.control_rate_hz, tracer=self.tracer)
+        self.control_loop.enabled = False
+        self.control_loop.start()
+
+    def new_worker(self):
+        source = self.source_factory() if self.source_factory else None
+        if self.process_mode:
+            worker_class = CVProcess
+        else:
+            # Imported here so --process never loads MediaPipe in the GUI
+            from cv_worker import CVWorker
+            worker_class = CVWorker
+        worker = worker_class(self.cam_select.currentIndex(), source=source,
+                          filter_name=self.filter_name, pace_fps=self.pace_fps,
+                          capture=self.capture_settings, motion_gate=self.motion_gate,
+                          hand_roi=self.hand_roi, adaptive=self.adaptive,
+                          infer_height=self.infer_height, display_height=self.display_height)
+        worker.overlay_enabled = self.show_overlay
+        worker.camera_switched.connect(self.camera_switched)
+        worker.finished.connect(self.worker_finished)
+        self.last_frame_seq = 0
+        return worker
+
+    def shutdown_cv(self):
+        """Stop the worker and control loop for good, releasing camera and models."""
+        if self.control_loop:
+            self.control_loop.stop()
+            self.control_loop.join()
+            self.control_loop = None
+        # Cleared first so worker_finished knows this stop was intended
+        worker, self.cv_worker = self.cv_worker, None
+        if worker:
+            worker.stop()
+            worker.wait()
+
+    def worker_finished(self):
+        if self.sender() is not self.cv_worker:
+            return  # shut down on purpose, or already replaced
+        self.statusbar.showMessage(
+            f"Camera {self.cam_select.currentIndex()} could not be opened or stopped "
+            f"delivering frames; press Start or View to retry")
 
     def change_camera(self, idx):
         if self.cv_worker:
+            # Opened in the background and swapped in between frames
             self.cv_worker.set_camera(idx)
+            self.statusbar.showMessage(f"Switching to camera {idx}...")
 
-    def update_video(self, img):
-        """This slot just caches the latest frame from the worker thread."""
-        self.latest_frame = img
+    def camera_switched(self, idx, ms, ok):
+        if ok:
+            info = self.cv_worker.capture_info if self.cv_worker else None
+            self.statusbar.showMessage(f"Camera {idx} live after {ms:.0f} ms: "
+                                       f"{format_settings(info)}", 5000)
+        elif idx != self.cam_select.currentIndex():
+            return  # superseded by a newer selection, which reports on its own
+        else:
+            self.statusbar.showMessage(f"Camera {idx} could not be opened; keeping the current one", 5000)
+
+    def closeEvent(self, event):
+        self.shutdown_cv()
+        super().closeEvent(event)
 
     def render_latest_frame(self):
         """This slot is called by a timer to render the frame on the UI thread."""
-        if self.latest_frame is not None:
-            self.videoLabel.setPixmap(QPixmap.fromImage(self.latest_frame))
+        if self.cv_worker is None:
+            return
+        latest = self.cv_worker.frames.latest(self.last_frame_seq)
+        if latest is None:
+            return  # no new frame since the last render
+        t = time.perf_counter()
+        self.last_frame_seq, buf, overlay = latest
+        h, w, ch = buf.shape
+        # Wraps the ring buffer without copying; fromImage makes the one copy
+        img = QImage(buf.data, w, h, ch * w, PREVIEW_FORMAT)
+        pixmap = QPixmap.fromImage(img)
+        if self.show_overlay and overlay is not None:
+            painter = QPainter(pixmap)
+            draw_overlay(painter, overlay, w, h)
+            painter.end()
+        self.videoLabel.setPixmap(pixmap)
+        self.cv_worker.profiler.record("render", (time.perf_counter() - t) * 1000.0)
+
+    def show_capture_info(self):
+        info = self.cv_worker.capture_info if self.cv_worker else None
+        self.statusbar.showMessage(f"Camera: {format_settings(info)}", 5000)
+
+    def toggle_overlay(self):
+        """Show/hide the skeleton and HUD; hidden also stops the worker building them."""
+        self.show_overlay = not self.show_overlay
+        if self.cv_worker:
+            self.cv_worker.overlay_enabled = self.show_overlay
+
+    def show_profile(self):
+        if self.cv_worker:
+            line = self.cv_worker.profiler.format_line(
+                ["capture", "preprocess", "pose", "hands", "infer", "frame", "render"])
+            e2e = self.tracer.format_line()
+            if e2e:
+                line = f"{line}  |  {e2e}"
+            self.profile_label.setText(line)
+
+    def dump_profile(self):
+        if not self.cv_worker:
+            return
+        stem = time.strftime("cv_profile_%Y%m%d_%H%M%S")
+        self.cv_worker.profiler.dump_json(stem + ".json")
+        self.cv_worker.profiler.dump_csv(stem + ".csv")
+        self.tracer.profiler.dump_json(stem + "_e2e.json")
+        self.statusbar.showMessage(f"Stage timings written to {stem}.json/.csv", 3000)
+
+    def cycle_filter(self):
+        names = list(FILTERS)
+        self.filter_name = names[(names.index(self.filter_name) + 1) % len(names)]
+        if self.cv_worker:
+            self.cv_worker.set_filter(self.filter_name)
+        self.statusbar.showMessage(f"Angle filter: {self.filter_name}", 3000)
 
     def send_servo(self, s, e, w):
-        # Invert the elbow angle because the motor is in the wrong direction
-        inverted_elbow_angle = 180 - e
-        rf.send_angles(s, inverted_elbow_angle, w) 
+        # Called from the control loop thread; robot_functions serialises writes
+        return rf.send_cv_angles(s, e, w)
 
     def set_inner_calib(self):
         if self.cv_worker:
@@ -137,13 +313,41 @@ class MainWindow(QMainWindow, Ui_MainWindow):
     def connect_arduino(self):
         port = "COM3"  # Or get from a QLineEdit/ComboBox if you want
         success = rf.connect_arduino(port)
-        if not success:
+        if success:
+            rf.start_reader(self.tracer.on_serial_line)
+        else:
             from PyQt5.QtWidgets import QMessageBox
             QMessageBox.critical(self, "Connection Error", f"Could not connect to Arduino on {port}")
 
 
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
+    parser = argparse.ArgumentParser(description="Jigness_bot controller")
+    add_capture_args(parser)
+    parser.add_argument("--process", action="store_true",
+                        help="run capture and inference in a child process")
+    parser.add_argument("--motion-gate", action="store_true",
+                        help="reuse the last landmarks while the scene is static")
+    parser.add_argument("--hand-roi", action="store_true",
+                        help="run Hands on a crop around the pose wrist")
+    parser.add_argument("--rate", type=float, default=10.0,
+                        help="servo command rate in Hz in Start mode (default 10; the firmware's "
+                             "replies to each command saturate 9600 baud above about 14)")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="adapt model quality to the frame budget")
+    parser.add_argument("--infer-height", type=int, default=None,
+                        help="model input height, e.g. 480 (default: camera height)")
+    parser.add_argument("--display-height", type=int, default=None,
+                        help="preview height, e.g. 720 (default: camera height)")
+    args, qt_args = parser.parse_known_args()
+    app = QApplication(sys.argv[:1] + qt_args)
     window = MainWindow()
+    window.capture_settings = settings_from_args(args)
+    window.process_mode = args.process
+    window.motion_gate = args.motion_gate
+    window.hand_roi = args.hand_roi
+    window.adaptive = args.adaptive
+    window.control_rate_hz = args.rate
+    window.infer_height = args.infer_height
+    window.display_height = args.display_height
     window.show()
     sys.exit(app.exec_())
@@ -0,0 +1,79 @@
+import cv2
+import numpy as np
+
+
+class MotionGate:
+    """Cheap check for whether a frame needs fresh inference.
+
+    Each frame is cut to the region around the last pose, shrunk to a
+    size x size grey thumbnail and compared with the thumbnail of the last
+    frame that was actually inferred. Pixels that differ by more than
+    pixel_threshold grey levels (above sensor noise) count as changed; if
+    fewer than min_changed of them did, the scene counts as static and the
+    previous landmarks can be reused. Comparing against the last inferred
+    frame rather than the previous one means slow drift still adds up and
+    triggers inference. Every max_skip frames inference runs anyway, so
+    tracking never goes stale.
+    """
+
+    def __init__(self, pixel_threshold=12, min_changed=0.003, size=48, margin=0.15, max_skip=15):
+        self.pixel_threshold = pixel_threshold
+        self.min_changed = min_changed
+        self.size = size
+        self.margin = margin
+        self.max_skip = max_skip
+        self.region = None  # (x0, y0, x1, y1) normalised, None = whole frame
+        self.checked = 0
+        self.skipped = 0
+        self.last_changed = 0.0  # fraction of thumbnail pixels that changed
+        self._reference = None
+        self._run = 0  # consecutive skips
+        self._thumb = np.empty((size, size, 3), np.uint8)
+        self._gray = np.empty((size, size), np.uint8)
+        self._diff = np.empty((size, size), np.uint8)
+
+    def reset(self):
+        self._reference = None
+        self._run = 0
+
+    def set_region(self, landmarks):
+        """Watch the bounding box of (N, 2+) normalised landmarks, or the whole frame if None."""
+        if landmarks is None:
+            self.region = None
+            return
+        lo = landmarks[:, :2].min(axis=0) - self.margin
+        hi = landmarks[:, :2].max(axis=0) + self.margin
+        self.region = (*np.clip(lo, 0.0, 1.0), *np.clip(hi, 0.0, 1.0))
+
+    def _thumbnail(self, frame):
+        h, w = frame.shape[:2]
+        if self.region is not None:
+            x0, y0, x1, y1 = self.region
+            crop = frame[int(y0 * h):max(int(y1 * h), int(y0 * h) + 1),
+                         int(x0 * w):max(int(x1 * w), int(x0 * w) + 1)]
+        else:
+            crop = frame
+        cv2.resize(crop, (self.size, self.size), dst=self._thumb, interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(self._thumb, cv2.COLOR_BGR2GRAY, dst=self._gray)
+
+    def check(self, frame):
+        """True if frame (BGR) should be inferred, False if the last results still hold."""
+        self.checked += 1
+        thumb = self._thumbnail(frame)
+        if self._reference is None or self._reference.shape != thumb.shape:
+            self._reference = thumb.copy()
+            self._run = 0
+            return True
+        cv2.absdiff(thumb, self._reference, dst=self._diff)
+        self.last_changed = np.count_nonzero(self._diff > self.pixel_threshold) / self._diff.size
+        if self.last_changed < self.min_changed and self._run < self.max_skip:
+            self._run += 1
+            self.skipped += 1
+            return False
+        self._reference[:] = thumb
+        self._run = 0
+        return True
+
+    @property
+    def skip_ratio(self):
+        return self.skipped / self.checked if self.checked else 0.0
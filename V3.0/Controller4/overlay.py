@@ -0,0 +1,47 @@
+from PyQt5.QtCore import Qt, QPointF
+from PyQt5.QtGui import QPainter, QPen, QColor, QFont
+from preview import POSE_CONNECTIONS
+
+# Draws cv_engine.Overlay records produced by the CV engine
+VISIBILITY_THRESHOLD = 0.5  # same cut-off mp_drawing.draw_landmarks uses
+
+SKELETON_PEN = QPen(QColor(224, 224, 224), 2)
+LANDMARK_PEN = QPen(QColor(255, 0, 0), 5, cap=Qt.RoundCap)
+ARM_PEN = QPen(QColor(0, 0, 255), 3)
+ANGLE_PEN = QPen(QColor(0, 255, 0))
+HUD_PEN = QPen(QColor(50, 50, 255))
+
+
+def draw_overlay(painter, overlay, w, h):
+    """Draw the pose skeleton, arm angles and HUD with an active QPainter."""
+    painter.setRenderHint(QPainter.Antialiasing)
+
+    lms = overlay.landmarks
+    if lms is not None:
+        pts = [QPointF(x * w, y * h) for x, y, _ in lms]
+        visible = lms[:, 2] >= VISIBILITY_THRESHOLD
+        painter.setPen(SKELETON_PEN)
+        for a, b in POSE_CONNECTIONS:
+            if visible[a] and visible[b]:
+                painter.drawLine(pts[a], pts[b])
+        painter.setPen(LANDMARK_PEN)
+        for i, p in enumerate(pts):
+            if visible[i]:
+                painter.drawPoint(p)
+
+    hip, shoulder, elbow, wrist = [QPointF(x * w, y * h) for x, y in overlay.joints]
+    painter.setPen(ARM_PEN)
+    painter.drawLine(hip, shoulder)
+    painter.drawLine(shoulder, elbow)
+    painter.drawLine(elbow, wrist)
+
+    s, e, wr = overlay.angles
+    painter.setPen(ANGLE_PEN)
+    painter.setFont(QFont("Sans", 14, QFont.Bold))
+    painter.drawText(shoulder + QPointF(20, -20), f"{int(s)}")
+    painter.drawText(elbow + QPointF(20, 20), f"{int(e)}")
+    painter.drawText(wrist + QPointF(-40, -20), f"{int(wr)}")
+
+    painter.setPen(HUD_PEN)
+    painter.setFont(QFont("Sans", 11, QFont.Bold))
+    painter.drawText(QPointF(10, 30), overlay.hud)
@@ -0,0 +1,47 @@
+import time
+
+
+class FramePacer:
+    """Paces a frame loop by sleeping only what is left of each frame's budget.
+
+    With target_fps set, frames start on absolute deadlines 1/target_fps
+    apart. A frame that ends after its deadline is an overrun; if the loop
+    falls more than a frame behind it resyncs instead of bursting.
+
+    With target_fps=None the loop is camera-driven. The source's blocking
+    read sets the pace, and frames the loop was too slow for show up as
+    dropped frames rather than overruns.
+
+    Either way every frame ends with at least min_idle of sleep. That
+    releases the GIL so the GUI thread always gets a turn, even when frames
+    are already waiting.
+    """
+
+    def __init__(self, target_fps=None, min_idle=0.001):
+        self.period = 1.0 / target_fps if target_fps else None
+        self.min_idle = min_idle
+        self.frames = 0
+        self.overruns = 0
+        self._deadline = None
+
+    def reset(self):
+        self._deadline = None
+
+    def wait(self):
+        """Call at the end of each frame; returns the seconds slept."""
+        now = time.monotonic()
+        self.frames += 1
+        delay = self.min_idle
+        if self.period is not None:
+            if self._deadline is None:
+                self._deadline = now
+            self._deadline += self.period
+            remaining = self._deadline - now
+            if remaining >= 0:
+                delay = max(delay, remaining)
+            else:
+                self.overruns += 1
+                if remaining < -self.period:
+                    self._deadline = now
+        time.sleep(delay)
+        return delay
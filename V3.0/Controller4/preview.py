@@ -0,0 +1,19 @@
+from PyQt5.QtGui import QImage
+
+# What the GUI needs to show preview frames, without importing MediaPipe
+# or the CV engine, so in --process mode the GUI process only renders and
+# sends serial commands.
+
+# Qt >= 5.14 reads BGR directly, which saves a full-frame cvtColor per preview
+PREVIEW_FORMAT = getattr(QImage, "Format_BGR888", QImage.Format_RGB888)
+PREVIEW_NEEDS_RGB = PREVIEW_FORMAT == QImage.Format_RGB888
+
+# Skeleton edges between pose landmark indices, as in
+# mediapipe.solutions.pose.POSE_CONNECTIONS
+POSE_CONNECTIONS = (
+    (0, 1), (1, 2), (2, 3), (3, 7), (0, 4), (4, 5), (5, 6), (6, 8), (9, 10),
+    (11, 12), (11, 13), (13, 15), (15, 17), (15, 19), (15, 21), (17, 19),
+    (12, 14), (14, 16), (16, 18), (16, 20), (16, 22), (18, 20),
+    (11, 23), (12, 24), (23, 24), (23, 25), (24, 26), (25, 27), (26, 28),
+    (27, 29), (28, 30), (29, 31), (30, 32), (27, 31), (28, 32),
+)
@@ -0,0 +1,143 @@
+import os
+import numpy as np
+
+from angles import arm_angles
+from filters import make_filter
+
+# Landmark session files: a 16-byte header followed by fixed-size records,
+# so the whole file can be memory-mapped as one structured array.
+#
+# header: b"JBLM" magic, uint32 version, uint32 record size, uint32 reserved
+MAGIC = b"JBLM"
+VERSION = 1
+HEADER_SIZE = 16
+
+FLAG_HAND = 1  # hand landmarks in this record are valid
+
+RECORD_DTYPE = np.dtype([
+    ("timestamp", "<f8"),          # capture time (time.monotonic seconds)
+    ("flags", "u1"),
+    ("frame_size", "<u2", (2,)),   # (width, height) the pixel math used
+    ("pose", "<f4", (33, 3)),      # normalised x, y, z
+    ("visibility", "<f4", (33,)),
+    ("hand", "<f4", (21, 3)),      # NaN when no hand
+    ("raw", "<f4", (3,)),          # shoulder, elbow, signed wrist before mapping
+    ("servo", "<f4", (3,)),        # smoothed servo angles that were sent
+    ("calibration", "<f4", (2,)),  # inner_ref, outer_ref
+])
+
+
+def _header():
+    return MAGIC + np.array([VERSION, RECORD_DTYPE.itemsize, 0], dtype="<u4").tobytes()
+
+
+class SessionRecorder:
+    """Appends one fixed-size record per processed frame to a session file."""
+
+    def __init__(self, path):
+        self.path = path
+        new = not os.path.exists(path) or os.path.getsize(path) == 0
+        if not new:
+            _check_header(path)
+        self._file = open(path, "ab")
+        if new:
+            self._file.write(_header())
+        # Single record reused for every write, so recording allocates nothing
+        self._rec = np.zeros(1, dtype=RECORD_DTYPE)
+        self.count = 0
+
+    def write(self, timestamp, frame_size, pose, visibility, hand, raw, servo,
+              inner_ref, outer_ref):
+        r = self._rec[0]
+        r["timestamp"] = timestamp
+        r["frame_size"] = frame_size
+        r["pose"] = pose
+        r["visibility"] = visibility
+        if hand is None:
+            r["flags"] = 0
+            r["hand"] = np.nan
+        else:
+            r["flags"] = FLAG_HAND
+            r["hand"] = hand
+        r["raw"] = raw
+        r["servo"] = servo
+        r["calibration"] = (inner_ref, outer_ref)
+        self._file.write(self._rec.data)
+        self.count += 1
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def _check_header(path):
+    with open(path, "rb") as f:
+        header = f.read(HEADER_SIZE)
+    if len(header) < HEADER_SIZE or header[:4] != MAGIC:
+        raise ValueError(f"{path} is not a landmark session file")
+    version, size, _ = np.frombuffer(header[4:], dtype="<u4")
+    if version != VERSION or size != RECORD_DTYPE.itemsize:
+        raise ValueError(f"{path}: unsupported session format (version {version}, record {size} bytes)")
+
+
+def load_session(path):
+    """Memory-map a session file as a structured array (zero-copy, read-only).
+
+    Fields are views into the file, e.g. load_session(p)["pose"] is an
+    (N, 33, 3) float32 array. A partially written last record is ignored.
+    """
+    _check_header(path)
+    count = (os.path.getsize(path) - HEADER_SIZE) // RECORD_DTYPE.itemsize
+    if count == 0:
+        return np.zeros(0, dtype=RECORD_DTYPE)
+    return np.memmap(path, dtype=RECORD_DTYPE, mode="r", offset=HEADER_SIZE, shape=(count,))
+
+
+def replay_angles(session):
+    """Recompute the raw (shoulder, elbow, signed wrist) angles for a session.
+
+    Runs the same vectorised kernel as the live pipeline over every record
+    at once; records without a hand get a wrist angle of 0.
+    """
+    out = np.empty((len(session), 3))
+    # Group by frame size: the wrist angle is measured in pixels
+    sizes = session["frame_size"]
+    for size in np.unique(sizes, axis=0):
+        rows = np.all(sizes == size, axis=1)
+        angles = arm_angles(session["pose"][rows], session["hand"][rows], tuple(size))
+        out[rows] = angles
+    has_hand = (session["flags"] & FLAG_HAND).astype(bool)
+    out[~has_hand, 2] = 0.0
+    return out
+
+
+def replay_targets(session, raw=None, inner_ref=None, outer_ref=None):
+    """Unsmoothed servo targets (shoulder, elbow, wrist) for a session.
+
+    Applies the same clipping and wrist calibration mapping as CVEngine.
+    The recorded per-frame calibration is used unless inner_ref/outer_ref
+    are given, which lets you retarget a session with new references.
+    """
+    if raw is None:
+        raw = replay_angles(session)
+    cal = session["calibration"].astype(np.float64)
+    inner = cal[:, 0] if inner_ref is None else np.full(len(raw), inner_ref)
+    outer = cal[:, 1] if outer_ref is None else np.full(len(raw), outer_ref)
+
+    span = outer - inner
+    ok = np.abs(span) >= 1e-3
+    t = (raw[:, 2] - inner) / np.where(ok, span, 1.0)
+    wrist = np.where(ok, np.clip(t * 180.0, 0.0, 180.0), 90.0)
+    has_hand = (session["flags"] & FLAG_HAND).astype(bool)
+    wrist[~has_hand] = 90.0
+
+    targets = np.clip(raw, 0.0, 180.0)
+    targets[:, 2] = wrist
+    return targets
+
+
+def replay_filter(values, timestamps, filter_name="moving_average", **params):
+    """Run a streaming filter (see filters.FILTERS) over recorded values."""
+    f = make_filter(filter_name, size=values.shape[1], **params)
+    return np.array([f(v, t) for v, t in zip(values, timestamps)])
@@ -1,7 +1,14 @@
 import serial
 import math
+import threading
+import time
 
 arduino = None  # Do not connect on import
+# GUI buttons and the CV control loop write from different threads
+_write_lock = threading.Lock()
+# Echo every command to the console; the headless runner turns this off
+verbose = True
+_reader = None
 
 def connect_arduino(port="COM3", baudrate=9600):
     """Try to connect to Arduino. Returns True if successful, False otherwise."""
@@ -15,6 +22,28 @@ def connect_arduino(port="COM3", baudrate=9600):
         arduino = None
         return False
 
+def start_reader(on_line):
+    """Pass every line the Arduino sends back to on_line(text, time) on a daemon thread.
+
+    The firmware answers each command with "Moved servo <id> to <angle>";
+    the latency tracer uses that as the delivery ack.
+    """
+    global _reader
+    if _reader is not None and _reader.is_alive():
+        return
+
+    def read_lines():
+        while arduino is not None and arduino.is_open:
+            try:
+                line = arduino.readline()
+            except Exception:
+                break  # port closed or unplugged
+            if line:
+                on_line(line.decode("utf-8", "replace").strip(), time.monotonic())
+
+    _reader = threading.Thread(target=read_lines, daemon=True)
+    _reader.start()
+
 # ---------------- Arm Configuration ---------------- #
 # Angles: [BR (360 servo), M1, M2, M3]
 angles = [90, 0, 0, 0]  # BR starts at 90
@@ -33,21 +62,32 @@ y = 0.0   # starting Y
 
 # ---------------- Helper: Send Command ---------------- #
 def send_servo(servo_id, angle):
-    """Send angle command to specific servo."""
+    """Send angle command to specific servo. Returns True if it was written."""
     global arduino
     if arduino is None or not arduino.is_open:
-        print("Arduino not connected.")
-        return
+        if verbose:
+            print("Arduino not connected.")
+        return False
     angle = max(0, min(180, int(angle)))
-    arduino.write(f"M {servo_id} {angle}\n".encode("utf-8"))
-    print(f"Sent: M {servo_id} {angle}")
+    with _write_lock:
+        arduino.write(f"M {servo_id} {angle}\n".encode("utf-8"))
+    if verbose:
+        print(f"Sent: M {servo_id} {angle}")
+    return True
 
 def send_angles(s, e, w):
-    """Send shoulder, elbow, wrist angles (servos 1,2,3)."""
-    send_servo(1, s)
-    send_servo(2, e)
-    send_servo(3, w)
-    print(f"Sent angles: S={s}, E={e}, W={w}")
+    """Send shoulder, elbow, wrist angles (servos 1,2,3). Returns True if all were written."""
+    written = send_servo(1, s)
+    written &= send_servo(2, e)
+    written &= send_servo(3, w)
+    if verbose:
+        print(f"Sent angles: S={s}, E={e}, W={w}")
+    return written
+
+def send_cv_angles(s, e, w):
+    """Send angles from the CV pipeline (human arm -> robot mounting)."""
+    # Invert the elbow angle because the motor is in the wrong direction
+    return send_angles(s, 180 - e, w)
 
 # ======================================================
 #                    JOINT MODE
@@ -0,0 +1,276 @@
+"""Soak test: run the GUI on synthetic frames for hours and watch for growth.
+
+    python soak.py --hours 4 --fps 60 --out soak.csv
+    python soak.py --hours 0.1 --mode start --size 1280x720
+    python soak.py --hours 4 --process   # CV pipeline in a child process
+    python soak.py --hours 4 --source arm.mp4 --mode start
+
+Opens the normal MainWindow and starts it in View (or Start) mode. Frames
+come from a realtime SyntheticSource instead of the camera, or from
+--source (see sources.open_source), looped. MediaPipe may find no pose in
+the synthetic stick figure, and then the overlay, servo channel and
+control loop never run. A recorded clip of a real arm exercises them all.
+Every --interval seconds one CSV row is written with:
+  - process RSS;
+  - native and Python thread counts;
+  - live QImage/QPixmap wrappers;
+  - Qt event-queue delay;
+  - capture-to-screen frame latency;
+  - frames rendered and frames dropped;
+  - the share of processed frames with a pose found.
+
+Rows are flushed as they are written, so a run that hangs still leaves
+its data behind.
+
+Qt does not expose its event-queue length. Instead a probe event is
+posted with each sample, and the time until it is delivered is recorded.
+A growing backlog shows up as a growing delay, and a frozen GUI as
+missing rows.
+
+At the end every metric is checked for sustained growth. The exit status
+is 1 if any metric is flagged.
+"""
+import argparse
+import csv
+import gc
+import sys
+import threading
+import time
+
+import numpy as np
+from PyQt5.QtCore import QCoreApplication, QEvent, QObject, QTimer
+from PyQt5.QtGui import QImage, QPixmap
+from PyQt5.QtWidgets import QApplication
+
+import robot_functions as rf
+from instrument import rss_mb
+from main import MainWindow
+from sources import SyntheticSource, open_source
+
+PROBE_EVENT = QEvent.Type(QEvent.registerEventType())
+
+FIELDS = ["elapsed_s", "rss_mb", "threads", "py_threads", "qimages", "qpixmaps",
+          "event_queue_ms", "latency_p50_ms", "latency_p95_ms", "rendered", "dropped", "pose_found"]
+
+# Metrics checked for growth, with the smallest rise worth flagging
+GROWTH_CHECKS = {"rss_mb": 20.0, "threads": 2, "py_threads": 2, "qimages": 5,
+                 "qpixmaps": 5, "event_queue_ms": 50.0, "latency_p95_ms": 50.0}
+
+
+def native_thread_count():
+    try:
+        import psutil
+        return psutil.Process().num_threads()
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("Threads:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return threading.active_count()
+
+
+def count_wrappers():
+    """(QImage, QPixmap) Python wrappers currently alive."""
+    images = pixmaps = 0
+    for obj in gc.get_objects():
+        if isinstance(obj, QImage):
+            images += 1
+        elif isinstance(obj, QPixmap):
+            pixmaps += 1
+    return images, pixmaps
+
+
+class QueueProbe(QObject):
+    """Measures how long a posted event waits in the GUI event queue."""
+
+    def __init__(self):
+        super().__init__()
+        self.sent = None
+        self.delay_ms = None
+
+    def post(self):
+        if self.sent is None:  # previous probe still queued: keep timing it
+            self.sent = time.monotonic()
+            QCoreApplication.postEvent(self, QEvent(PROBE_EVENT))
+
+    def pending_ms(self):
+        return None if self.sent is None else (time.monotonic() - self.sent) * 1000.0
+
+    def event(self, event):
+        if event.type() == PROBE_EVENT:
+            self.delay_ms = (time.monotonic() - self.sent) * 1000.0
+            self.sent = None
+            return True
+        return super().event(event)
+
+
+class Soak:
+    """Drives a MainWindow and samples it on the GUI thread."""
+
+    def __init__(self, window, writer, interval):
+        self.window = window
+        self.writer = writer
+        self.rows = []
+        self.start = time.monotonic()
+        self.probe = QueueProbe()
+        self.latencies = []
+        self.rendered = 0
+        self.last_seq = 0
+        self.last_counts = (0, 0)  # (frames processed, poses published) at the last sample
+        self.frames_total = 0
+        self.poses_total = 0
+        # Runs right after the window's own render slot on the same timer
+        window.video_update_timer.timeout.connect(self.after_render)
+        self.timer = QTimer()
+        self.timer.setInterval(int(interval * 1000))
+        self.timer.timeout.connect(self.sample)
+
+    def after_render(self):
+        worker = self.window.cv_worker
+        if worker is None or self.window.last_frame_seq == self.last_seq:
+            return
+        self.last_seq = self.window.last_frame_seq
+        self.rendered += 1
+        self.latencies.append((time.monotonic() - worker.frames.reading_timestamp) * 1000.0)
+
+    def sample(self):
+        # A probe that is still queued reports how long it has waited so far
+        delay = self.probe.pending_ms()
+        if delay is None:
+            delay = self.probe.delay_ms
+        self.probe.post()
+
+        images, pixmaps = count_wrappers()
+        lat = np.asarray(self.latencies) if self.latencies else None
+        worker = self.window.cv_worker
+        pose_found = None
+        if worker is not None:
+            # Every processed frame is published; only frames with a pose
+            # put servo targets
+            counts = (worker.frames.seq, worker.servo_data.peek()[0])
+            if counts[0] < self.last_counts[0]:
+                self.last_counts = (0, 0)  # a new worker started counting again
+            frames, poses = (now - last for now, last in zip(counts, self.last_counts))
+            self.last_counts = counts
+            self.frames_total += frames
+            self.poses_total += poses
+            if frames > 0:
+                pose_found = poses / frames
+        row = {
+            "elapsed_s": round(time.monotonic() - self.start, 1),
+            "rss_mb": rss_mb(),
+            "threads": native_thread_count(),
+            "py_threads": threading.active_count(),
+            "qimages": images,
+            "qpixmaps": pixmaps,
+            "event_queue_ms": delay,
+            "latency_p50_ms": None if lat is None else float(np.percentile(lat, 50)),
+            "latency_p95_ms": None if lat is None else float(np.percentile(lat, 95)),
+            "rendered": self.rendered,
+            "dropped": worker.dropped_frames if worker else None,
+            "pose_found": pose_found,
+        }
+        self.latencies = []
+        self.rendered = 0
+        self.rows.append(row)
+        self.writer(row)
+
+
+def growth_report(rows, checks=GROWTH_CHECKS, segments=8, skip=0.1):
+    """Flag metrics that keep rising over the run.
+
+    The first `skip` of the run (model loading, caches filling) is ignored.
+    The rest is cut into equal segments. A metric is flagged when the
+    segment medians never fall and the last is above the first by at least
+    its threshold. Returns {metric: (first, last, slope per hour, flagged)}.
+    """
+    rows = rows[int(len(rows) * skip):]
+    report = {}
+    if len(rows) < segments:
+        return report
+    for metric, threshold in checks.items():
+        points = [(r["elapsed_s"], r[metric]) for r in rows if r[metric] is not None]
+        if len(points) < segments:
+            continue
+        t, v = (np.asarray(a, dtype=float) for a in zip(*points))
+        medians = [float(np.median(part)) for part in np.array_split(v, segments)]
+        slope = float(np.polyfit(t / 3600.0, v, 1)[0])
+        rising = all(b >= a for a, b in zip(medians, medians[1:]))
+        flagged = rising and medians[-1] - medians[0] >= threshold
+        report[metric] = (medians[0], medians[-1], slope, flagged)
+    return report
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="Long-run soak test of the GUI and CV worker")
+    p.add_argument("--hours", type=float, default=2.0, help="run length (default 2)")
+    p.add_argument("--source", default=None,
+                   help="video file, image directory or camera index to loop instead of "
+                        "the synthetic camera")
+    p.add_argument("--fps", type=float, default=60.0, help="synthetic camera frame rate (default 60)")
+    p.add_argument("--size", default="640x480", help="synthetic frame size (default 640x480)")
+    p.add_argument("--mode", choices=["view", "start"], default="view",
+                   help="start also runs the control loop (serial writes are dropped "
+                        "unless an Arduino is connected)")
+    p.add_argument("--interval", type=float, default=10.0, help="seconds between samples (default 10)")
+    p.add_argument("--out", default="soak.csv", help="CSV of samples (default soak.csv)")
+    p.add_argument("--process", action="store_true",
+                   help="run the CV pipeline in a child process (see cv_process.py)")
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    width, height = (int(v) for v in args.size.lower().split("x"))
+    rf.verbose = False
+
+    app = QApplication(sys.argv[:1])
+    window = MainWindow()
+    window.process_mode = args.process
+    if args.source:
+        window.source_factory = lambda: open_source(args.source, realtime=True, loop=True)
+    else:
+        window.source_factory = lambda: SyntheticSource(width, height, fps=args.fps,
+                                                        realtime=True, loop=True)
+    window.show()
+
+    with open(args.out, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        writer.writeheader()
+
+        def write(row):
+            writer.writerow(row)
+            f.flush()
+            print("  ".join(f"{k}={v:.1f}" if isinstance(v, float) else f"{k}={v}"
+                            for k, v in row.items()), flush=True)
+
+        soak = Soak(window, write, args.interval)
+        (window.start_cv if args.mode == "start" else window.start_view)()
+        soak.timer.start()
+        QTimer.singleShot(int(args.hours * 3600 * 1000), app.quit)
+        app.exec_()
+        soak.timer.stop()
+        window.shutdown_cv()
+
+    report = growth_report(soak.rows)
+    print(f"\nSoak finished: {len(soak.rows)} samples in {args.out}")
+    if soak.frames_total:
+        print(f"Pose found in {soak.poses_total / soak.frames_total:.0%} of "
+              f"{soak.frames_total} frames")
+        if not soak.poses_total:
+            print("No pose was ever found: overlay, servo output and the control loop "
+                  "were not exercised (try --source with a recorded clip)")
+    flagged = False
+    for metric, (first, last, slope, grew) in report.items():
+        flagged |= grew
+        mark = "  GROWING" if grew else ""
+        print(f"{metric:>15}: {first:10.1f} -> {last:10.1f}  ({slope:+.1f}/h){mark}")
+    return 1 if flagged else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,194 @@
+import os
+import time
+import cv2
+import numpy as np
+from capture import CaptureThread
+
+# Offline frame sources for CVEngine, for benchmarking and regression runs
+# on machines without a camera. They implement the same interface as
+# capture.CaptureThread: start(), read(timeout), finished, dropped, stop().
+#
+# realtime=False delivers every frame as fast as the consumer asks for it,
+# so runs are deterministic. realtime=True paces frames at the source fps
+# and, like a live camera, skips frames the consumer was too slow for.
+# Realtime timestamps follow the media clock (start time + index / fps),
+# which is when a camera would have delivered the frame. Fast replay runs
+# ahead of that clock, so its frames are stamped with time.monotonic() at
+# read instead and latency stays meaningful; media_time keeps the
+# position in the clip (index / fps) of the last frame read either way.
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+class ReplaySource:
+    """Base class: subclasses provide _frame(index) and frame_count."""
+
+    fps = 30.0
+    frame_count = None  # None = endless
+
+    def __init__(self, realtime=False, loop=False):
+        self.realtime = realtime
+        self.loop = loop
+        self.finished = False
+        self.dropped = 0
+        self.frames_read = 0
+        self.media_time = 0.0
+        self._index = 0  # frames since start(); keeps counting across loops
+        self._start = None
+
+    def start(self):
+        self._start = time.monotonic()
+        self._index = 0
+        self.finished = False
+
+    def _frame(self, index):
+        raise NotImplementedError
+
+    def read(self, timeout=1.0):
+        if self.finished:
+            return None
+        index = self._index
+        if self.realtime:
+            due = self._start + index / self.fps
+            now = time.monotonic()
+            if now < due:
+                if due - now > timeout:
+                    time.sleep(timeout)
+                    return None
+                time.sleep(due - now)
+            else:
+                # Skip to the frame that is due now, as a live camera would
+                behind = int((now - self._start) * self.fps) - index
+                if behind > 0:
+                    self.dropped += behind
+                    index += behind
+
+        position = index
+        if self.frame_count is not None and index >= self.frame_count:
+            if not self.loop or self.frame_count == 0:
+                self.finished = True
+                return None
+            position %= self.frame_count
+        frame = self._frame(position)
+        if frame is None:
+            self.finished = True
+            return None
+        self._index = index + 1
+        self.frames_read += 1
+        self.media_time = position / self.fps
+        if self.realtime:
+            return frame, self._start + index / self.fps
+        return frame, time.monotonic()
+
+    def stop(self):
+        self.finished = True
+
+
+class VideoFileSource(ReplaySource):
+    """Frames from a video file, at the file's own frame rate."""
+
+    def __init__(self, path, realtime=False, loop=False):
+        super().__init__(realtime, loop)
+        self.path = path
+        self._cap = None
+        self._pos = 0
+
+    def start(self):
+        self._cap = cv2.VideoCapture(self.path)
+        if not self._cap.isOpened():
+            raise IOError(f"Could not open video file {self.path}")
+        self.fps = self._cap.get(cv2.CAP_PROP_FPS) or 30.0
+        count = int(self._cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        self.frame_count = count if count > 0 else None
+        self._pos = 0
+        super().start()
+
+    def _frame(self, index):
+        if index != self._pos:
+            if index < self._pos or index - self._pos > 30:
+                self._cap.set(cv2.CAP_PROP_POS_FRAMES, index)
+            else:
+                while self._pos < index:  # short skips: grab is cheaper than seeking
+                    self._cap.grab()
+                    self._pos += 1
+        ret, frame = self._cap.read()
+        self._pos = index + 1
+        return frame if ret else None
+
+    def stop(self):
+        super().stop()
+        if self._cap is not None:
+            self._cap.release()
+            self._cap = None
+
+
+class ImageDirSource(ReplaySource):
+    """Frames from the image files in a directory, in file-name order."""
+
+    def __init__(self, directory, fps=30.0, realtime=False, loop=False):
+        super().__init__(realtime, loop)
+        self.fps = fps
+        self.paths = sorted(
+            os.path.join(directory, f) for f in os.listdir(directory)
+            if f.lower().endswith(IMAGE_EXTENSIONS))
+        self.frame_count = len(self.paths)
+
+    def _frame(self, index):
+        return cv2.imread(self.paths[index])
+
+
+class SyntheticSource(ReplaySource):
+    """Generated frames: a stick-figure arm swinging over a noisy background.
+
+    Deterministic for a given seed. MediaPipe will not necessarily find a
+    pose in it; it is meant for throughput and plumbing tests.
+    """
+
+    def __init__(self, width=640, height=480, fps=30.0, frames=300,
+                 realtime=False, loop=False, seed=0):
+        super().__init__(realtime, loop)
+        self.fps = fps
+        self.frame_count = frames
+        rng = np.random.default_rng(seed)
+        self._background = rng.integers(90, 140, (height, width, 3), dtype=np.uint8)
+
+    def _frame(self, index):
+        frame = self._background.copy()
+        h, w = frame.shape[:2]
+        t = index / self.fps
+        shoulder = np.array([0.45 * w, 0.35 * h])
+        hip = np.array([0.45 * w, 0.75 * h])
+        upper = 0.2 * h
+        fore = 0.18 * h
+        a1 = np.radians(30 + 40 * np.sin(2 * np.pi * 0.25 * t))
+        a2 = a1 + np.radians(20 + 50 * (1 + np.sin(2 * np.pi * 0.4 * t)) / 2)
+        elbow = shoulder + upper * np.array([np.sin(a1), np.cos(a1)])
+        wrist = elbow + fore * np.array([np.sin(a2), np.cos(a2)])
+        head = shoulder + np.array([-0.05 * w, -0.12 * h])
+
+        pts = [tuple(int(v) for v in p) for p in (hip, shoulder, elbow, wrist)]
+        cv2.circle(frame, tuple(int(v) for v in head), int(0.07 * h), (60, 80, 200), -1)
+        for a, b in zip(pts, pts[1:]):
+            cv2.line(frame, a, b, (40, 60, 180), int(0.04 * h))
+        cv2.circle(frame, pts[-1], int(0.035 * h), (50, 90, 210), -1)
+        return frame
+
+
+def open_source(spec, realtime=False, loop=False):
+    """Build a source from a spec string.
+
+    An integer selects a camera; "synthetic" (or "synthetic:WxH") a
+    SyntheticSource; a directory an ImageDirSource; anything else is
+    opened as a video file.
+    """
+    if isinstance(spec, int) or str(spec).isdigit():
+        return CaptureThread(int(spec))
+    spec = str(spec)
+    if spec.startswith("synthetic"):
+        width, height = 640, 480
+        if ":" in spec:
+            width, height = (int(v) for v in spec.split(":", 1)[1].lower().split("x"))
+        return SyntheticSource(width, height, realtime=realtime, loop=loop)
+    if os.path.isdir(spec):
+        return ImageDirSource(spec, realtime=realtime, loop=loop)
+    return VideoFileSource(spec, realtime=realtime, loop=loop)
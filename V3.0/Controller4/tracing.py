@@ -0,0 +1,118 @@
+import re
+import threading
+import time
+from collections import deque
+
+from instrument import make_profiler
+
+# Glass-to-servo latency tracing. CVEngine stamps a Trace for every frame
+# that produces servo targets; it rides along with the value through the
+# servo_data channel, and the control loop completes it once the serial
+# write for that sample has returned. Optionally the firmware's
+# "Moved servo <id> to <angle>" echo closes it for good; the echoed angle
+# must match the one sent, so replies to manual button presses are ignored.
+
+# (segment, from stamp, to stamp), in pipeline order
+SEGMENTS = [
+    ("inference", "capture", "inferred"),
+    ("angles", "inferred", "smoothed"),
+    ("publish", "smoothed", "published"),
+    ("control_wait", "published", "picked"),
+    ("serial", "picked", "written"),
+]
+
+ACK_RE = re.compile(r"Moved servo (\d+) to (-?\d+)")
+ACK_SERVO = 3  # last of the three lines send_angles writes per command
+ACK_INDEX = 2  # its position in the (shoulder, elbow, wrist) sample
+
+
+class Trace:
+    """Monotonic timestamps of one frame on its way to the arm."""
+
+    __slots__ = ("id", "capture", "inferred", "smoothed", "published")
+
+    def __init__(self, trace_id, capture):
+        self.id = trace_id
+        self.capture = capture
+        self.inferred = capture
+        self.smoothed = capture
+        self.published = capture
+
+
+class LatencyTracer:
+    """Collects completed traces into per-segment latency windows."""
+
+    def __init__(self, window=600, ack_timeout=1.0):
+        self.profiler = make_profiler(window)
+        self.ack_timeout = ack_timeout
+        self._pending = deque(maxlen=64)  # (capture, written, angle) awaiting an ack
+        self._lock = threading.Lock()
+        self.completed = 0
+        self.acked = 0
+
+    def complete(self, trace, picked, written, ack_angle=None):
+        """Record a trace whose serial write finished at `written`.
+
+        ack_angle is the angle sent to ACK_SERVO; only an echo of that
+        angle acks the trace. None accepts any echo.
+        """
+        stamps = {
+            "capture": trace.capture, "inferred": trace.inferred,
+            "smoothed": trace.smoothed, "published": trace.published,
+            "picked": picked, "written": written,
+        }
+        for name, a, b in SEGMENTS:
+            self.profiler.record(name, (stamps[b] - stamps[a]) * 1000.0)
+        self.profiler.record("total", (written - trace.capture) * 1000.0)
+        self.completed += 1
+        with self._lock:
+            if ack_angle is not None:
+                ack_angle = max(0, min(180, int(ack_angle)))  # as send_servo clamps it
+            self._pending.append((trace.capture, written, ack_angle))
+
+    def on_serial_line(self, line, t=None):
+        """Feed a line read back from the Arduino; matches firmware acks."""
+        t = time.monotonic() if t is None else t
+        m = ACK_RE.search(line)
+        if not m or int(m.group(1)) != ACK_SERVO:
+            return
+        angle = int(m.group(2))
+        with self._lock:
+            while self._pending and t - self._pending[0][1] > self.ack_timeout:
+                self._pending.popleft()  # ack lost or never sent
+            for i, (capture, written, sent) in enumerate(self._pending):
+                if sent is None or sent == angle:
+                    break
+            else:
+                return  # not a reply to a traced command, e.g. a manual button
+            for _ in range(i + 1):
+                self._pending.popleft()  # earlier commands' acks were lost
+        self.profiler.record("ack", (t - written) * 1000.0)
+        self.profiler.record("total_ack", (t - capture) * 1000.0)
+        self.acked += 1
+
+    def report(self):
+        """Latency summary plus the segment with the largest median share."""
+        summary = self.profiler.summary()
+        segments = [name for name, _, _ in SEGMENTS if name in summary]
+        report = {"summary": summary, "dominant": None}
+        if segments:
+            total = sum(summary[s]["p50"] for s in segments) or 1.0
+            dominant = max(segments, key=lambda s: summary[s]["p50"])
+            report["dominant"] = {"segment": dominant,
+                                  "share": summary[dominant]["p50"] / total}
+        return report
+
+    def format_line(self):
+        report = self.report()
+        total = report["summary"].get("total")
+        if total is None:
+            return ""
+        line = f"e2e {total['p50']:.0f}/{total['p95']:.0f} ms"
+        ack = report["summary"].get("total_ack")
+        if ack is not None:
+            line += f" (acked {ack['p50']:.0f}/{ack['p95']:.0f} ms)"
+        if report["dominant"]:
+            d = report["dominant"]
+            line += f"  dominant: {d['segment']} {d['share'] * 100:.0f}%"
+        return line